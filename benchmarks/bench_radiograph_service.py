@@ -0,0 +1,193 @@
+# benchmarks/bench_radiograph_service.py
+"""
+Micro-benchmarks for the radiograph service hot paths.
+
+    python -m benchmarks.bench_radiograph_service --output bench_results.json
+    python -m benchmarks.bench_radiograph_service --compare bench_results.json
+
+Runs on CPU only with synthetic panoramics and a stand-in U-Net, so results
+are comparable across machines of the same class and across commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic import (
+    RESOLUTIONS,
+    bench_environment,
+    build_stub_unet,
+    synthetic_class_mask,
+    synthetic_jpeg,
+    synthetic_panoramic,
+    synthetic_predictions,
+)
+
+
+def _measure(func: Callable[[], object], repeat: int, warmup: int) -> Dict:
+    for _ in range(warmup):
+        func()
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(samples[0] * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p95_ms": round(samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000, 3),
+        "stdev_ms": round(statistics.pstdev(samples) * 1000, 3),
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def _environment() -> Dict:
+    import cv2
+    import numpy as np
+    import tensorflow as tf
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "tensorflow": tf.__version__,
+    }
+
+
+def run_benchmarks(resolutions: List[str], repeat: int, warmup: int) -> Dict:
+    storage_root = tempfile.mkdtemp(prefix="radiograph-bench-")
+    bench_environment(storage_root)
+
+    # Imported after the environment is prepared so Settings resolves
+    from src.services import radiograph_service as service
+    from src.services.storage_service import get_storage, artifact_key, ORIGINAL_PREFIX
+    from src.services.inference_service import KerasBackend
+
+    loop = asyncio.new_event_loop()
+    run = loop.run_until_complete
+    storage = get_storage()
+    model = KerasBackend("stub", model=build_stub_unet())
+    model.load()
+    results: Dict[str, Dict] = {}
+
+    def record(name: str, resolution: str, func: Callable[[], object]) -> None:
+        stats = _measure(func, repeat, warmup)
+        results.setdefault(name, {})[resolution] = stats
+        print(f"{name:<32} {resolution:<8} median {stats['median_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms")
+
+    # Resolution-independent stages operate on the fixed 512x256 model grid
+    predictions = synthetic_predictions()
+    class_mask = synthetic_class_mask()
+    record("postprocess_prediction_4patch", "model", lambda: run(service.postprocess_prediction_4patch(predictions)))
+    record(
+        "convert_class_to_rgb",
+        "model",
+        lambda: run(service.convert_class_to_rgb(class_mask, service.classes, "unused")),
+    )
+    record("summarize_findings", "model", lambda: service.summarize_findings(class_mask))
+
+    for resolution in resolutions:
+        width, height = RESOLUTIONS[resolution]
+        image = synthetic_panoramic(width, height)
+        image_key = artifact_key(ORIGINAL_PREFIX, f"bench_{resolution}.jpg")
+        image_data = synthetic_jpeg(width, height)
+        storage.put_bytes(image_key, image_data)
+
+        record("decode_full", resolution, lambda: service.decode_image(image_data))
+        record(
+            "decode_for_inference",
+            resolution,
+            lambda: service.decode_for_inference(image_data, service.image_dimensions(image_data)),
+        )
+
+        record("preprocess_image_4patch", resolution, lambda: run(service.preprocess_image_4patch(image)))
+
+        mask_rgb = run(service.convert_class_to_rgb(class_mask, service.classes, "unused"))
+        record(
+            "create_overlay_image",
+            resolution,
+            lambda: run(service.create_overlay_image(image, mask_rgb, image_key)),
+        )
+
+        _, mask_key, _, _, findings = run(service.predict_image(model, image_key))
+        record("predict_image", resolution, lambda: run(service.predict_image(model, image_key)))
+        # /filter paints the stored findings' RLE masks; rows without them decode the mask PNG
+        rle_masks = {finding["condition"]: finding["mask_rle"] for finding in findings}
+        record(
+            "apply_filters",
+            resolution,
+            lambda: run(service.apply_filters(image_key, mask_key, ["Karies", "Impaksi"], rle_masks=rle_masks)),
+        )
+        record(
+            "apply_filters_mask_png",
+            resolution,
+            lambda: run(service.apply_filters(image_key, mask_key, ["Karies", "Impaksi"])),
+        )
+
+    loop.close()
+    return {"environment": _environment(), "resolutions": {name: RESOLUTIONS[name] for name in resolutions}, "results": results}
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> int:
+    """Print median ratios against a baseline; returns the number of regressions."""
+    regressions = 0
+    print(f"\n{'benchmark':<32} {'size':<8} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, by_resolution in current["results"].items():
+        for resolution, stats in by_resolution.items():
+            base = baseline.get("results", {}).get(name, {}).get(resolution)
+            if not base:
+                continue
+            ratio = stats["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+            flag = "  REGRESSION" if ratio > 1 + threshold else ""
+            regressions += bool(flag)
+            print(
+                f"{name:<32} {resolution:<8} {base['median_ms']:>10.3f}ms {stats['median_ms']:>10.3f}ms {ratio:>7.2f}x{flag}"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the radiograph service hot paths")
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before flagging (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.resolutions, args.repeat, args.warmup)
+    if args.output:
+        with open(args.output, "w") as file_object:
+            json.dump(report, file_object, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as file_object:
+            regressions = compare(report, json.load(file_object), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
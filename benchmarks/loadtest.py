@@ -0,0 +1,331 @@
+# benchmarks/loadtest.py
+"""
+End-to-end load test for the API.
+
+    # start the app with a stub model on SQLite and drive it for 60s
+    python -m benchmarks.loadtest --concurrency 16 --duration 60 --save-baseline loadtest_baseline.json
+
+    # against a local Postgres, checking for regressions
+    python -m benchmarks.loadtest --database-url postgresql://... --baseline loadtest_baseline.json
+
+    # against an already running server
+    python -m benchmarks.loadtest --target http://127.0.0.1:8000 --email admin@mail.com --password ...
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+import httpx
+
+from benchmarks.loadtest_app import LOADTEST_EMAIL, LOADTEST_PASSWORD
+from benchmarks.synthetic import RESOLUTIONS, synthetic_jpeg
+
+API = "/api/v1"
+DEFAULT_MIX = {"login": 1, "list": 10, "predict": 3, "filter": 5, "delete": 1}
+
+
+def _percentile(sorted_samples: List[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(int(round(q * (len(sorted_samples) - 1))), len(sorted_samples) - 1)
+    return sorted_samples[index]
+
+
+class LoadTest:
+    def __init__(self, base_url: str, email: str, password: str, mix: Dict[str, int], image: bytes):
+        self.base_url = base_url
+        self.email = email
+        self.password = password
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.image = image
+        self.token: Optional[str] = None
+        self.radiograph_ids: List[int] = []
+        # Deleted here, so a listing taken before the delete landed cannot bring them back
+        self.deleted_ids: Set[int] = set()
+        self.concurrency = 1
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        # Operations drawn from the mix that had nothing to act on; never recorded as another endpoint
+        self.skipped: Dict[str, int] = defaultdict(int)
+        self.status_codes: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def _timed(self, name: str, request) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.latencies[name].append(time.perf_counter() - start)
+            self.errors[name] += 1
+            self.status_codes[name][0] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        self.status_codes[name][response.status_code] += 1
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    async def login(self, client: httpx.AsyncClient) -> None:
+        response = await self._timed(
+            "login", client.post(f"{API}/auth/login", json={"email": self.email, "password": self.password})
+        )
+        if response is not None and response.status_code == 200:
+            self.token = response.json()["data"]["access_token"]
+
+    async def list(self, client: httpx.AsyncClient) -> None:
+        await self._timed("list", client.get(f"{API}/radiograph/data", params={"page": 1, "limit": 100}, headers=self.headers))
+
+    async def predict(self, client: httpx.AsyncClient) -> None:
+        files = {"file": (f"loadtest_{uuid.uuid4().hex}.jpg", self.image, "image/jpeg")}
+        await self._timed(
+            "predict",
+            client.post(f"{API}/radiograph/predict", files=files, data={"patient_name": "Load Test"}, headers=self.headers),
+        )
+
+    async def filter(self, client: httpx.AsyncClient) -> None:
+        if not self.radiograph_ids:
+            self.skipped["filter"] += 1
+            return
+        payload = {"radiograph_id": random.choice(self.radiograph_ids), "selected_categories": ["Karies", "Impaksi"]}
+        await self._timed("filter", client.post(f"{API}/radiograph/filter", json=payload, headers=self.headers))
+
+    async def delete(self, client: httpx.AsyncClient, worker: int = 0) -> None:
+        # Worker k only deletes ids with id % concurrency == k, so two workers never race for one row
+        owned = [radiograph_id for radiograph_id in self.radiograph_ids if radiograph_id % self.concurrency == worker]
+        if len(self.radiograph_ids) < 2 or not owned:
+            self.skipped["delete"] += 1
+            return
+        radiograph_id = random.choice(owned)
+        self.radiograph_ids.remove(radiograph_id)
+        self.deleted_ids.add(radiograph_id)
+        await self._timed("delete", client.delete(f"{API}/radiograph/{radiograph_id}", headers=self.headers))
+
+    async def refresh_ids(self, client: httpx.AsyncClient) -> None:
+        response = await client.get(f"{API}/radiograph/data", params={"page": 1, "limit": 100}, headers=self.headers)
+        if response.status_code == 200:
+            self.radiograph_ids = [row["id"] for row in response.json()["data"] if row["id"] not in self.deleted_ids]
+
+    async def seed_radiographs(self, client: httpx.AsyncClient, count: int) -> None:
+        """Untimed predictions so filter and delete have rows to work on from the first second."""
+        missing = count - len(self.radiograph_ids)
+        for _ in range(max(missing, 0)):
+            files = {"file": (f"loadtest_seed_{uuid.uuid4().hex}.jpg", self.image, "image/jpeg")}
+            await client.post(f"{API}/radiograph/predict", files=files, data={"patient_name": "Load Test"}, headers=self.headers)
+        if missing > 0:
+            await self.refresh_ids(client)
+
+    async def worker(self, client: httpx.AsyncClient, deadline: float, index: int = 0) -> None:
+        while time.perf_counter() < deadline:
+            operation = random.choices(self.operations, weights=self.weights)[0]
+            if operation == "delete":
+                await self.delete(client, index)
+            else:
+                await getattr(self, operation)(client)
+            if operation == "predict" and random.random() < 0.5:
+                await self.refresh_ids(client)
+            # A skipped operation never awaited anything; let the other workers run
+            await asyncio.sleep(0)
+
+    async def run(self, concurrency: int, duration: float, timeout: float, seed_radiographs: int = 0) -> Dict:
+        self.concurrency = concurrency
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=timeout, limits=limits) as client:
+            await self.login(client)
+            if self.token is None:
+                raise RuntimeError("Login failed, cannot run the load test")
+            await self.refresh_ids(client)
+            if any(name in self.operations for name in ("filter", "delete")):
+                await self.seed_radiographs(client, seed_radiographs)
+            self.latencies.clear()
+            self.errors.clear()
+            self.skipped.clear()
+            self.status_codes.clear()
+
+            started = time.perf_counter()
+            deadline = started + duration
+            await asyncio.gather(*(self.worker(client, deadline, index) for index in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        return self.report(concurrency, elapsed)
+
+    def report(self, concurrency: int, elapsed: float) -> Dict:
+        endpoints = {}
+        for name, samples in self.latencies.items():
+            ordered = sorted(samples)
+            endpoints[name] = {
+                "requests": len(ordered),
+                "errors": self.errors[name],
+                "error_rate": round(self.errors[name] / len(ordered), 4) if ordered else 0.0,
+                "throughput_rps": round(len(ordered) / elapsed, 3),
+                "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+                "p50_ms": round(_percentile(ordered, 0.50) * 1000, 2),
+                "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+                "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+                "status_codes": {str(code): count for code, count in self.status_codes[name].items()},
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "concurrency": concurrency,
+            "duration_seconds": round(elapsed, 2),
+            "total_requests": total,
+            "throughput_rps": round(total / elapsed, 3),
+            "endpoints": endpoints,
+            "skipped": dict(self.skipped),
+        }
+
+
+def print_report(report: Dict) -> None:
+    print(f"\n{report['total_requests']} requests in {report['duration_seconds']}s "
+          f"({report['throughput_rps']} req/s, concurrency {report['concurrency']})")
+    print(f"{'endpoint':<10} {'reqs':>7} {'rps':>9} {'err%':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, stats in sorted(report["endpoints"].items()):
+        print(
+            f"{name:<10} {stats['requests']:>7} {stats['throughput_rps']:>9.2f} {stats['error_rate'] * 100:>6.2f}% "
+            f"{stats['p50_ms']:>8.1f}ms {stats['p95_ms']:>8.1f}ms {stats['p99_ms']:>8.1f}ms"
+        )
+    for name, count in sorted(report.get("skipped", {}).items()):
+        print(f"{name:<10} skipped {count}x with no radiograph it could act on")
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, stats in report["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {stats['p95_ms']}ms")
+        if base["throughput_rps"] and stats["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {stats['throughput_rps']} req/s")
+        if stats["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {base['error_rate']} -> {stats['error_rate']}")
+    return regressions
+
+
+def count_orphaned_findings(database_url: str) -> int:
+    """Findings whose radiograph is gone; any are a cascade bug that breaks id reuse."""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as connection:
+            return connection.execute(
+                text(
+                    "SELECT COUNT(*) FROM radiograph_findings f "
+                    "LEFT JOIN radiographs r ON r.id = f.radiograph_id WHERE r.id IS NULL"
+                )
+            ).scalar()
+    finally:
+        engine.dispose()
+
+
+def _start_app(port: int, database_url: Optional[str]) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.loadtest_app", "--port", str(port)]
+    if database_url:
+        command += ["--database-url", database_url]
+    return subprocess.Popen(command)
+
+
+def _wait_until_up(base_url: str, process: Optional[subprocess.Popen], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError("The app exited during startup")
+        try:
+            if httpx.get(f"{base_url}/", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"The app did not come up within {timeout}s")
+
+
+def _parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the radiograph API")
+    parser.add_argument("--target", help="Base URL of a running server; starts a stub-model app when omitted")
+    parser.add_argument("--database-url", help="Database for the started app (defaults to SQLite)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--email", default=LOADTEST_EMAIL)
+    parser.add_argument("--password", default=LOADTEST_PASSWORD)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to drive load")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX,
+                        help="Operation weights, e.g. login=1,list=10,predict=3,filter=5,delete=1")
+    parser.add_argument("--resolution", choices=list(RESOLUTIONS), default="medium")
+    parser.add_argument("--seed-radiographs", type=int, default=None,
+                        help="Radiographs to create before the timed window (default: 2x concurrency)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--save-baseline", help="Write the report as a baseline file")
+    parser.add_argument("--baseline", help="Compare against a saved baseline and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    process = None
+    base_url = args.target
+    database_url = args.database_url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        if database_url is None:
+            # Chosen here rather than by the app so the run can be checked afterwards
+            database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='radiograph-loadtest-'), 'loadtest.db')}"
+        process = _start_app(args.port, database_url)
+    try:
+        _wait_until_up(base_url, process, timeout=120.0)
+        width, height = RESOLUTIONS[args.resolution]
+        test = LoadTest(base_url, args.email, args.password, args.mix, synthetic_jpeg(width, height, seed=args.seed))
+        seed_radiographs = 2 * args.concurrency if args.seed_radiographs is None else args.seed_radiographs
+        report = asyncio.run(test.run(args.concurrency, args.duration, args.timeout, seed_radiographs))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    if database_url is not None:
+        # The run deletes and re-predicts throughout, so every delete must take its findings along
+        report["orphaned_findings"] = count_orphaned_findings(database_url)
+    print_report(report)
+    if report.get("orphaned_findings"):
+        print(f"INTEGRITY {report['orphaned_findings']} findings rows outlived their radiograph")
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as file_object:
+            json.dump(report, file_object, indent=2)
+        print(f"Report written to {path}")
+    if args.baseline:
+        with open(args.baseline) as file_object:
+            regressions = compare_to_baseline(report, json.load(file_object), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+    if report.get("orphaned_findings"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/loadtest_app.py
+"""
+Runs the API for load testing with a stub model in place of the U-Net.
+
+    python -m benchmarks.loadtest_app --port 8765 --database-url sqlite:///./loadtest.db
+
+Used by benchmarks/loadtest.py, but can also be started on its own.
+"""
+import argparse
+import os
+import tempfile
+
+LOADTEST_EMAIL = "loadtest@mail.com"
+LOADTEST_PASSWORD = "loadtest"
+
+
+def prepare_environment(database_url: str, storage_root: str) -> None:
+    os.environ.setdefault("JWT_SECRET_KEY", "loadtest")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "120")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["STORAGE_BACKEND"] = "local"
+    os.environ["STORAGE_LOCAL_ROOT"] = storage_root
+    # The stub model replaces the real one, so skip loading it at startup
+    os.environ["INFERENCE_WARMUP_ON_STARTUP"] = "false"
+    os.makedirs(os.path.join(storage_root, "uploads"), exist_ok=True)
+
+
+def install_stub_model() -> None:
+    from benchmarks.synthetic import NumpyStubModel
+    from src.controllers import radiograph_controller
+
+    stub = NumpyStubModel()
+
+    async def load_stub_model():
+        return stub
+
+    radiograph_controller.load_model = load_stub_model
+
+
+def seed_loadtest_user() -> None:
+    from src.db.session import Base, SessionLocal, engine
+    from src.models.user_model import User
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if not db.query(User).filter(User.email == LOADTEST_EMAIL).first():
+            db.add(
+                User(
+                    name="Load Test",
+                    email=LOADTEST_EMAIL,
+                    role="super_admin",
+                    password=User.get_password_hash(LOADTEST_PASSWORD),
+                )
+            )
+            db.commit()
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Start the API with a stub model for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", default=None, help="Defaults to a fresh SQLite file")
+    parser.add_argument("--storage-root", default=None)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="radiograph-loadtest-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    prepare_environment(database_url, args.storage_root or workdir)
+    install_stub_model()
+    seed_loadtest_user()
+
+    import uvicorn
+    from src.main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/synthetic.py
+"""Synthetic inputs shared by the benchmark and load-test tools."""
+import os
+
+# Benchmarks must be reproducible on CPU-only machines
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import cv2
+import numpy as np
+
+# Common panoramic sizes (width, height)
+RESOLUTIONS = {
+    "small": (1024, 512),
+    "medium": (2048, 1024),
+    "large": (2976, 1536),
+}
+
+PATCH_SHAPE = (128, 256, 3)
+NUM_CLASSES = 5
+
+
+def bench_environment(storage_root: str) -> None:
+    """Settings needed to import the service modules outside a deployment."""
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    os.environ["STORAGE_BACKEND"] = "local"
+    os.environ["STORAGE_LOCAL_ROOT"] = storage_root
+
+
+def synthetic_panoramic(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Grey panoramic-like RGB image: a dark background, a bright dental arch and noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    cx, cy = width / 2, height * 0.15
+    radius = np.sqrt(((x - cx) / (width * 0.42)) ** 2 + ((y - cy) / (height * 0.7)) ** 2)
+    arch = np.exp(-((radius - 1.0) ** 2) / 0.01) * 170
+    teeth = (np.sin(x / width * np.pi * 32) > 0.2) * arch * 0.4
+    noise = rng.normal(0, 12, size=(height, width))
+    grey = np.clip(40 + arch + teeth + noise, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(grey, cv2.COLOR_GRAY2RGB)
+
+
+def synthetic_jpeg(width: int, height: int, seed: int = 0, quality: int = 95) -> bytes:
+    image = synthetic_panoramic(width, height, seed)
+    _, buffer = cv2.imencode(".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+
+def synthetic_class_mask(height: int = 256, width: int = 512, seed: int = 0) -> np.ndarray:
+    """Mostly-background class-index mask with a few blobs of every condition."""
+    rng = np.random.default_rng(seed)
+    mask = np.full((height, width), NUM_CLASSES - 1, dtype=np.uint8)
+    for class_id in range(NUM_CLASSES - 1):
+        for _ in range(3):
+            cx, cy = int(rng.integers(0, width)), int(rng.integers(0, height))
+            axes = (int(rng.integers(4, 20)), int(rng.integers(4, 12)))
+            cv2.ellipse(mask, (cx, cy), axes, 0, 0, 360, class_id, -1)
+    return mask
+
+
+def synthetic_predictions(batch: int = 4, seed: int = 0) -> np.ndarray:
+    """Softmax-shaped model output for a 4-patch batch."""
+    rng = np.random.default_rng(seed)
+    logits = rng.normal(size=(batch, PATCH_SHAPE[0], PATCH_SHAPE[1], NUM_CLASSES)).astype(np.float32)
+    logits[..., NUM_CLASSES - 1] += 3.0
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def build_stub_unet(seed: int = 0):
+    """Small Keras U-Net with the production model's input and output shapes."""
+    import tensorflow as tf
+
+    tf.random.set_seed(seed)
+    inputs = tf.keras.Input(shape=PATCH_SHAPE)
+    c1 = tf.keras.layers.Conv2D(16, 3, padding="same", activation="relu")(inputs)
+    p1 = tf.keras.layers.MaxPooling2D()(c1)
+    c2 = tf.keras.layers.Conv2D(32, 3, padding="same", activation="relu")(p1)
+    p2 = tf.keras.layers.MaxPooling2D()(c2)
+    bottleneck = tf.keras.layers.Conv2D(64, 3, padding="same", activation="relu")(p2)
+    u2 = tf.keras.layers.UpSampling2D()(bottleneck)
+    c3 = tf.keras.layers.Conv2D(32, 3, padding="same", activation="relu")(tf.keras.layers.Concatenate()([u2, c2]))
+    u1 = tf.keras.layers.UpSampling2D()(c3)
+    c4 = tf.keras.layers.Conv2D(16, 3, padding="same", activation="relu")(tf.keras.layers.Concatenate()([u1, c1]))
+    outputs = tf.keras.layers.Conv2D(NUM_CLASSES, 1, activation="softmax")(c4)
+    return tf.keras.Model(inputs, outputs, name="stub_unet")
+
+
+class NumpyStubModel:
+    """TensorFlow-free stand-in exposing the Keras `predict` call used by the service."""
+
+    def __init__(self, seed: int = 0):
+        self._predictions = synthetic_predictions(seed=seed)
+
+    def predict(self, batch, batch_size=None, verbose=None):
+        return self._predictions[: len(batch)]
@@ -15,6 +15,9 @@ from src.models.token_blacklist_model import TokenBlacklist
 from src.models.user_model import User
 from src.models.category_model import Category
 from src.models.radiograph_model import Radiograph
+from src.models.radiograph_finding_model import RadiographFinding
+from src.models.idempotency_key_model import IdempotencyKey
+from src.models.file_cleanup_job_model import FileCleanupJob
 
 # this is the Alembic Config object
 config = context.config
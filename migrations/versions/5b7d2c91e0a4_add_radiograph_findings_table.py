@@ -0,0 +1,41 @@
+"""add radiograph_findings table
+
+Revision ID: 5b7d2c91e0a4
+Revises: 4e6380b14183
+Create Date: 2026-10-19 14:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d2c91e0a4'
+down_revision: Union[str, None] = '4e6380b14183'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('radiograph_findings',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('radiograph_id', sa.Integer(), nullable=False),
+    sa.Column('condition', sa.String(length=50), nullable=False),
+    sa.Column('pixel_area', sa.Integer(), nullable=False),
+    sa.Column('area_ratio', sa.Float(), nullable=False),
+    sa.Column('component_count', sa.Integer(), nullable=False),
+    sa.Column('bounding_boxes', sa.JSON(), nullable=False),
+    sa.Column('centroids', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['radiograph_id'], ['radiographs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('radiograph_id', 'condition', name='uq_radiograph_findings_condition')
+    )
+    op.create_index(op.f('ix_radiograph_findings_radiograph_id'), 'radiograph_findings', ['radiograph_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_radiograph_findings_radiograph_id'), table_name='radiograph_findings')
+    op.drop_table('radiograph_findings')
@@ -0,0 +1,26 @@
+"""add mask_rle to radiograph_findings
+
+Revision ID: 8c41f0d2b6e3
+Revises: 5b7d2c91e0a4
+Create Date: 2026-10-19 14:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41f0d2b6e3'
+down_revision: Union[str, None] = '5b7d2c91e0a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('radiograph_findings', sa.Column('mask_rle', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('radiograph_findings', 'mask_rle')
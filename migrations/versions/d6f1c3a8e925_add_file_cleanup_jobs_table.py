@@ -0,0 +1,39 @@
+"""add file_cleanup_jobs table
+
+Revision ID: d6f1c3a8e925
+Revises: b3e9a7c5d218
+Create Date: 2026-10-19 18:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f1c3a8e925'
+down_revision: Union[str, None] = 'b3e9a7c5d218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('file_cleanup_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.String(length=30), nullable=False),
+    sa.Column('queued_files', sa.Integer(), nullable=False),
+    sa.Column('deleted_files', sa.Integer(), nullable=False),
+    sa.Column('failed_files', sa.JSON(), nullable=False),
+    sa.Column('queued_all', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_file_cleanup_jobs_finished_at'), 'file_cleanup_jobs', ['finished_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_file_cleanup_jobs_finished_at'), table_name='file_cleanup_jobs')
+    op.drop_table('file_cleanup_jobs')
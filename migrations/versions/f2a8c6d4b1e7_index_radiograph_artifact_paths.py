@@ -0,0 +1,30 @@
+"""index radiograph artifact paths
+
+Revision ID: f2a8c6d4b1e7
+Revises: d6f1c3a8e925
+Create Date: 2026-10-19 19:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8c6d4b1e7'
+down_revision: Union[str, None] = 'd6f1c3a8e925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_radiographs_original'), 'radiographs', ['original'], unique=False)
+    op.create_index(op.f('ix_radiographs_mask_file'), 'radiographs', ['mask_file'], unique=False)
+    op.create_index(op.f('ix_radiographs_overlay'), 'radiographs', ['overlay'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_radiographs_overlay'), table_name='radiographs')
+    op.drop_index(op.f('ix_radiographs_mask_file'), table_name='radiographs')
+    op.drop_index(op.f('ix_radiographs_original'), table_name='radiographs')
@@ -0,0 +1,30 @@
+# src/commands/check_model_parity.py
+import argparse
+import json
+import sys
+from src.core.config import settings
+from src.services.inference_service import BACKENDS, create_backend
+from src.services.model_parity_service import compare_backends, load_calibration_batches
+
+
+def run_parity_check():
+    parser = argparse.ArgumentParser(description="Compare the class-index output of two inference backends")
+    parser.add_argument("--reference", choices=list(BACKENDS), default="keras")
+    parser.add_argument("--reference-path", default=None)
+    parser.add_argument("--candidate", choices=list(BACKENDS), default=settings.INFERENCE_BACKEND)
+    parser.add_argument("--candidate-path", default=None)
+    parser.add_argument("--calibration-dir", default=None)
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--min-agreement", type=float, default=0.999)
+    args = parser.parse_args()
+
+    reference = create_backend(args.reference, args.reference_path)
+    candidate = create_backend(args.candidate, args.candidate_path)
+    report = compare_backends(reference, candidate, load_calibration_batches(args.calibration_dir, args.samples))
+    print(json.dumps(report, indent=2))
+    if report["pixel_agreement"] < args.min_agreement or not report["all_detection_flags_match"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_parity_check()
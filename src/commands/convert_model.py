@@ -0,0 +1,57 @@
+# src/commands/convert_model.py
+import argparse
+import json
+import sys
+from src.core.config import settings
+from src.services.inference_service import INPUT_SHAPE, create_backend
+from src.services.model_parity_service import compare_backends, load_calibration_batches
+
+
+def convert_to_onnx(model, output_path: str, opset: int) -> None:
+    import tensorflow as tf
+    import tf2onnx
+
+    signature = [tf.TensorSpec((None, *INPUT_SHAPE), tf.float32, name="input")]
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=opset, output_path=output_path)
+
+
+def convert_to_tflite(model, output_path: str) -> None:
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    with open(output_path, "wb") as file_object:
+        file_object.write(converter.convert())
+
+
+def run_conversion():
+    parser = argparse.ArgumentParser(description="Convert the Keras U-Net to ONNX or TFLite and check parity")
+    parser.add_argument("--to", choices=["onnx", "tflite"], required=True)
+    parser.add_argument("--source", default=settings.MODEL_PATH, help="Keras .h5 model")
+    parser.add_argument("--output", default=None, help="Defaults to ONNX_MODEL_PATH / TFLITE_MODEL_PATH")
+    parser.add_argument("--opset", type=int, default=13)
+    parser.add_argument("--calibration-dir", default=None, help="Radiographs used for the parity check")
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--min-agreement", type=float, default=0.999, help="Required class-index pixel agreement")
+    parser.add_argument("--skip-parity", action="store_true")
+    args = parser.parse_args()
+
+    output_path = args.output or (settings.ONNX_MODEL_PATH if args.to == "onnx" else settings.TFLITE_MODEL_PATH)
+    reference = create_backend("keras", args.source)
+    if args.to == "onnx":
+        convert_to_onnx(reference.model, output_path, args.opset)
+    else:
+        convert_to_tflite(reference.model, output_path)
+    print(f"Wrote {args.to} model to {output_path}")
+
+    if args.skip_parity:
+        return
+    candidate = create_backend(args.to, output_path)
+    report = compare_backends(reference, candidate, load_calibration_batches(args.calibration_dir, args.samples))
+    print(json.dumps(report, indent=2))
+    if report["pixel_agreement"] < args.min_agreement or not report["all_detection_flags_match"]:
+        print("Parity check failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_conversion()
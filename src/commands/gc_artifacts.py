@@ -0,0 +1,42 @@
+# src/commands/gc_artifacts.py
+import argparse
+import json
+import sys
+from sqlalchemy.orm import Session
+from src.db.session import SessionLocal
+from src.services.artifact_gc_service import collect_orphans, gc_lock
+
+
+def run_gc():
+    parser = argparse.ArgumentParser(description="Reclaim orphaned files under uploads/")
+    parser.add_argument("--dry-run", action="store_true", help="Only report orphaned files")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--batch-pause", type=float, default=None, help="Seconds to sleep between batches")
+    parser.add_argument("--max-deletions", type=int, default=None)
+    parser.add_argument("--min-age", type=float, default=None, help="Ignore files newer than this many seconds")
+    parser.add_argument("--from-start", action="store_true", help="Ignore the saved cursor and scan from the beginning")
+    args = parser.parse_args()
+
+    # Same lock as the in-app periodic run, so the two never share the cursor file
+    with gc_lock() as acquired:
+        if not acquired:
+            print(json.dumps({"skipped": True, "reason": "artifact GC already running on this node"}, indent=2))
+            sys.exit(1)
+        db: Session = SessionLocal()
+        try:
+            stats = collect_orphans(
+                db,
+                dry_run=args.dry_run,
+                batch_size=args.batch_size,
+                batch_pause=args.batch_pause,
+                max_deletions=args.max_deletions,
+                min_age=args.min_age,
+                resume=not args.from_start,
+            )
+            print(json.dumps(stats, indent=2))
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    run_gc()
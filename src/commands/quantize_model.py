@@ -0,0 +1,97 @@
+# src/commands/quantize_model.py
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from src.core.config import settings
+from src.services.inference_service import INPUT_SHAPE, create_backend
+from src.services.model_parity_service import compare_backends, load_calibration_batches
+
+
+def quantize(model, mode: str, calibration_batches, full_integer: bool) -> bytes:
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+        return converter.convert()
+
+    def representative_dataset():
+        # The converter calibrates activation ranges one patch at a time
+        for batch in calibration_batches:
+            for patch in batch:
+                yield [patch[np.newaxis].astype(np.float32)]
+
+    converter.representative_dataset = representative_dataset
+    if full_integer:
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def mean_latency_ms(backend, batches, rounds: int = 3) -> float:
+    backend.predict(batches[0])
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for batch in batches:
+            backend.predict(batch)
+    return round((time.perf_counter() - start) / (rounds * len(batches)) * 1000, 3)
+
+
+def run_quantization():
+    parser = argparse.ArgumentParser(description="Build a quantized TFLite variant of the U-Net and report its accuracy delta")
+    parser.add_argument("--mode", choices=["int8", "float16"], required=True)
+    parser.add_argument("--source", default=settings.MODEL_PATH, help="Float Keras .h5 model")
+    parser.add_argument("--output", default=None, help="Defaults to TFLITE_INT8_MODEL_PATH / TFLITE_FLOAT16_MODEL_PATH")
+    parser.add_argument("--calibration-dir", default=None, help="Radiographs used to calibrate int8 ranges")
+    parser.add_argument("--calibration-samples", type=int, default=100)
+    parser.add_argument("--eval-dir", default=None, help="Radiographs for the accuracy report (defaults to the calibration set)")
+    parser.add_argument("--eval-samples", type=int, default=50)
+    parser.add_argument("--full-integer", action="store_true", help="Use int8 model inputs and outputs as well")
+    parser.add_argument("--report", default=None, help="Write the accuracy report as JSON")
+    parser.add_argument("--min-iou", type=float, default=0.0, help="Fail if any condition's IoU falls below this")
+    args = parser.parse_args()
+
+    if args.mode == "int8" and not args.calibration_dir:
+        parser.error("--calibration-dir is required for int8 quantization")
+
+    output_path = args.output or (
+        settings.TFLITE_INT8_MODEL_PATH if args.mode == "int8" else settings.TFLITE_FLOAT16_MODEL_PATH
+    )
+    reference = create_backend("keras", args.source)
+    calibration = load_calibration_batches(args.calibration_dir, args.calibration_samples)
+    with open(output_path, "wb") as file_object:
+        file_object.write(quantize(reference.model, args.mode, calibration, args.full_integer))
+    print(f"Wrote {args.mode} model to {output_path}")
+
+    candidate = create_backend("tflite", output_path)
+    evaluation = load_calibration_batches(args.eval_dir or args.calibration_dir, args.eval_samples)
+    report = compare_backends(reference, candidate, evaluation)
+    report.update(
+        {
+            "mode": args.mode,
+            "full_integer": args.full_integer,
+            "input_shape": [None, *INPUT_SHAPE],
+            "reference_size_bytes": os.path.getsize(args.source),
+            "quantized_size_bytes": os.path.getsize(output_path),
+            "reference_latency_ms": mean_latency_ms(reference, evaluation[:10]),
+            "quantized_latency_ms": mean_latency_ms(candidate, evaluation[:10]),
+        }
+    )
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as file_object:
+            json.dump(report, file_object, indent=2)
+
+    condition_ious = [iou for name, iou in report["per_class_iou"].items() if name != "background" and iou is not None]
+    if condition_ious and min(condition_ious) < args.min_iou:
+        print(f"Per-class IoU below {args.min_iou}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_quantization()
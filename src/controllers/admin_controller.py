@@ -0,0 +1,28 @@
+# src/controllers/admin_controller.py
+from fastapi import HTTPException, status
+from starlette.responses import FileResponse
+from src.db.session import get_pool_status
+from src.core.profiling import list_profiles, profile_path
+from src.handlers.response_handler import ResponseSchema
+
+def get_db_pool_stats() -> ResponseSchema:
+    return ResponseSchema(
+        status_code=status.HTTP_200_OK,
+        message="Database pool statistics",
+        data=get_pool_status(),
+        error=None,
+    )
+
+def get_profiles() -> ResponseSchema:
+    return ResponseSchema(
+        status_code=status.HTTP_200_OK,
+        message="Stored request profiles",
+        data=list_profiles(),
+        error=None,
+    )
+
+def download_profile(profile_id: str) -> FileResponse:
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=path.rsplit("/", 1)[-1], media_type="application/octet-stream")
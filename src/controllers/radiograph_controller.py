@@ -1,10 +1,22 @@
 from fastapi import HTTPException, UploadFile, Form
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from src.models.radiograph_model import Radiograph
-from src.services.radiograph_service import load_model, predict_image, apply_filters
+from src.models.radiograph_finding_model import RadiographFinding
+from src.services.radiograph_service import load_model, predict_image, apply_filters, image_dimensions
+from src.services.admission_service import inference_admission, estimate_prediction_bytes
+from src.services.storage_service import get_storage, artifact_key, ORIGINAL_PREFIX
+from src.services.file_cleanup_service import create_cleanup_job, enqueue_file_removal, finish_enqueueing, get_cleanup_job
 from src.models.user_model import User
+from src.schemas.radiograph_schema import DetectedConditions, Pagination, RadiographFinding as RadiographFindingSchema, RadiographListItem, RadiographListResponse
+from src.core.config import settings
+from src.core.metrics import observe_stage
+from src.services.inference_service import track_inference
+from src.services.idempotency_service import claim_idempotency_key, complete_idempotency_key, release_idempotency_key, request_fingerprint, upload_digest
 import os
+import base64
+import asyncio
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -13,101 +25,212 @@ logger = logging.getLogger(__name__)
 class BulkDeleteRequest:
     ids: List[int]
 
-def get_radiographs(page: int, limit: int, db: Session, current_user: User) -> Dict:
+# Everything but the RLE mask, which only the filter path reads
+FINDING_SUMMARY_COLUMNS = (
+    RadiographFinding.radiograph_id,
+    RadiographFinding.condition,
+    RadiographFinding.pixel_area,
+    RadiographFinding.area_ratio,
+    RadiographFinding.component_count,
+    RadiographFinding.bounding_boxes,
+    RadiographFinding.centroids,
+)
+
+def load_findings(db: Session, radiograph_ids: List[int]) -> Dict[int, List[RadiographFindingSchema]]:
+    """Findings for a page of radiographs in one column-only query, keyed by radiograph id."""
+    if not radiograph_ids:
+        return {}
+    rows = (
+        db.query(*FINDING_SUMMARY_COLUMNS)
+        .filter(RadiographFinding.radiograph_id.in_(radiograph_ids))
+        .order_by(RadiographFinding.radiograph_id, RadiographFinding.condition)
+        .all()
+    )
+    grouped: Dict[int, List[RadiographFindingSchema]] = {}
+    for row in rows:
+        grouped.setdefault(row.radiograph_id, []).append(RadiographFindingSchema.model_validate(row))
+    return grouped
+
+def get_radiograph_findings(id: int, db: Session, current_user: User) -> Dict:
+    if not db.query(Radiograph.id).filter(Radiograph.id == id).first():
+        raise HTTPException(status_code=404, detail="Radiograph not found")
+    return {"radiograph_id": id, "findings": load_findings(db, [id]).get(id, [])}
+
+# Columns the list endpoint renders; skips loading and identity-mapping full ORM objects
+RADIOGRAPH_LIST_COLUMNS = (
+    Radiograph.id,
+    Radiograph.patient_name,
+    Radiograph.status_detection,
+    Radiograph.original,
+    Radiograph.mask_file,
+    Radiograph.overlay,
+    Radiograph.has_impaksi,
+    Radiograph.has_karies,
+    Radiograph.has_lesi_periapikal,
+    Radiograph.has_resorpsi,
+    Radiograph.tasks,
+    Radiograph.created_at,
+)
+
+def get_radiographs(page: int, limit: int, db: Session, current_user: User) -> RadiographListResponse:
     try:
-        total = db.query(Radiograph).count()
-        offset = (page - 1) * limit
-        radiographs = db.query(Radiograph).offset(offset).limit(limit).all()
-        result = []
-        for r in radiographs:
-            result.append(
-                {
-                    "id": r.id,
-                    "patient_name": r.patient_name,
-                    "status_detection": r.status_detection,
-                    "original_file": r.original if r.original and os.path.exists(r.original) else None,
-                    "mask_file": r.mask_file if r.mask_file and os.path.exists(r.mask_file) else None,
-                    "overlay_file": r.overlay if r.overlay and os.path.exists(r.overlay) else None,
-                    "detected_conditions": {
-                        "has_impaksi": r.has_impaksi,
-                        "has_karies": r.has_karies,
-                        "has_lesi_periapikal": r.has_lesi_periapikal,
-                        "has_resorpsi": r.has_resorpsi,
-                    },
-                    "task_id": r.tasks,
-                    "created_at": r.created_at,
-                }
-            )
-        return {
-            "data": result,
-            "pagination": {
-                "total": total,
-                "page": page,
-                "limit": limit,
-                "total_pages": (total + limit - 1) // limit,
-            },
-        }
+        with observe_stage("db", "list_radiographs"):
+            total = db.query(func.count(Radiograph.id)).scalar()
+            offset = (page - 1) * limit
+            rows = db.query(*RADIOGRAPH_LIST_COLUMNS).offset(offset).limit(limit).all()
+            findings_by_radiograph = load_findings(db, [row.id for row in rows])
+        with observe_stage("db", "build_radiograph_list"):
+            result = [
+                RadiographListItem(
+                    id=row.id,
+                    patient_name=row.patient_name,
+                    status_detection=row.status_detection,
+                    # Stored keys as-is: probing each file would cost a storage round trip per
+                    # artifact per row; missing files 404 at GET /{id}/files/{kind} instead
+                    original_file=row.original or None,
+                    mask_file=row.mask_file or None,
+                    overlay_file=row.overlay or None,
+                    detected_conditions=DetectedConditions(
+                        has_impaksi=bool(row.has_impaksi),
+                        has_karies=bool(row.has_karies),
+                        has_lesi_periapikal=bool(row.has_lesi_periapikal),
+                        has_resorpsi=bool(row.has_resorpsi),
+                    ),
+                    findings=findings_by_radiograph.get(row.id, []),
+                    task_id=row.tasks,
+                    created_at=row.created_at,
+                )
+                for row in rows
+            ]
+        return RadiographListResponse(
+            data=result,
+            pagination=Pagination(
+                total=total,
+                page=page,
+                limit=limit,
+                total_pages=(total + limit - 1) // limit,
+            ),
+        )
     except Exception as e:
         logger.error(f"Failed to retrieve radiographs: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve radiographs: {str(e)}")
 
-async def predict_radiograph(file: UploadFile, patient_name: str, db: Session, current_user: User) -> Dict:
-    os.makedirs("uploads/original", exist_ok=True)
-    original_file_path = os.path.join("uploads", "original", file.filename)
-    with open(original_file_path, "wb") as file_object:
-        content = await file.read()
-        file_object.write(content)
+def replay_predict_response(stored: Dict) -> Dict:
+    """Rebuild a stored /predict response; the overlay image is re-read rather than kept in the table."""
+    response = dict(stored)
+    overlay_file = response.get("overlay_file")
+    storage = get_storage()
+    if response.get("image") is None and overlay_file and storage.exists(overlay_file):
+        response["image"] = base64.b64encode(storage.get_bytes(overlay_file)).decode("utf-8")
+    return response
+
+async def predict_radiograph(file: UploadFile, patient_name: str, db: Session, current_user: User, idempotency_key: Optional[str] = None, priority: Optional[str] = None) -> Dict:
+    idempotency_record = None
+    if idempotency_key:
+        # Hash the image itself: a reused key with a different image of the same name and
+        # size must be rejected, not answered with the first image's diagnosis
+        content_digest = await asyncio.to_thread(upload_digest, file.file)
+        fingerprint = request_fingerprint(patient_name, file.filename, content_digest)
+        idempotency_record, stored_response = await claim_idempotency_key(db, current_user.id, idempotency_key, fingerprint)
+        if stored_response is not None:
+            return replay_predict_response(stored_response)
+    try:
+        response = await run_prediction(file, patient_name, db, current_user.id, priority)
+    except BaseException as e:
+        if idempotency_record is not None:
+            release_idempotency_key(db, idempotency_record, e)
+        raise
+    radiograph_id = response.pop("radiograph_id")
+    if idempotency_record is not None:
+        # The base64 overlay is not stored; replays read it back from the overlay file
+        complete_idempotency_key(db, idempotency_record, response, {**response, "image": None}, radiograph_id=radiograph_id)
+    return response
+
+async def run_prediction(file: UploadFile, patient_name: str, db: Session, user_id: int, priority: Optional[str] = None) -> Dict:
+    # Size the request from the image header so overload is shed before any decoding
+    await file.seek(0)
+    width, height = image_dimensions(file.file)
+    # Queued per user, so one clinician's batch upload cannot starve everyone else
+    async with inference_admission.admit(estimate_prediction_bytes(width, height), user_id=user_id, priority=priority):
+        return await store_and_predict(file, patient_name, db)
+
+async def store_and_predict(file: UploadFile, patient_name: str, db: Session) -> Dict:
+    storage = get_storage()
+    original_file_path = artifact_key(ORIGINAL_PREFIX, os.path.basename(file.filename))
+    # Stream the spooled upload straight into storage instead of reading it into memory
+    await file.seek(0)
+    with observe_stage("predict", "upload_store"):
+        storage.put_stream(original_file_path, file.file, content_type=file.content_type)
     try:
         status_detection = "process"
-        model = await load_model("src/ml_models/unet_gigi_penyakit_crop_256_512.h5")
-        encoded_overlay, mask_file_path, detected_conditions, overlay_file_path = await predict_image(model, original_file_path)
+        with track_inference():
+            with observe_stage("predict", "model_load"):
+                model = await load_model()
+            encoded_overlay, mask_file_path, detected_conditions, overlay_file_path, findings = await predict_image(model, original_file_path)
         status_detection = "success"
-        new_radiograph = Radiograph.create_and_generate_task(
-            db=db,
-            patient_name=patient_name,
-            original=original_file_path,
-            status_detection=status_detection,
-            mask_file=mask_file_path,
-            overlay=overlay_file_path,
-        )
-        new_radiograph.has_lesi_periapikal = detected_conditions.get("has_lesi_periapikal", False)
-        new_radiograph.has_resorpsi = detected_conditions.get("has_resorpsi", False)
-        new_radiograph.has_karies = detected_conditions.get("has_karies", False)
-        new_radiograph.has_impaksi = detected_conditions.get("has_impaksi", False)
-        db.add(new_radiograph)
-        db.commit()
-        db.refresh(new_radiograph)
+        # Detection flags go into the insert so the row is written in a single commit
+        with observe_stage("db", "insert_radiograph"):
+            new_radiograph = Radiograph.create_and_generate_task(
+                db=db,
+                patient_name=patient_name,
+                original=original_file_path,
+                status_detection=status_detection,
+                mask_file=mask_file_path,
+                overlay=overlay_file_path,
+                has_lesi_periapikal=detected_conditions.get("has_lesi_periapikal", False),
+                has_resorpsi=detected_conditions.get("has_resorpsi", False),
+                has_karies=detected_conditions.get("has_karies", False),
+                has_impaksi=detected_conditions.get("has_impaksi", False),
+                findings=findings,
+            )
         return {
             "message": "Prediction successful",
             "patient_name": patient_name,
             "status_detection": status_detection,
-            "original_file": original_file_path if os.path.exists(original_file_path) else None,
-            "mask_file": mask_file_path if os.path.exists(mask_file_path) else None,
-            "overlay_file": overlay_file_path if os.path.exists(overlay_file_path) else None,
+            # Just written; no existence round trips to the storage backend
+            "original_file": original_file_path,
+            "mask_file": mask_file_path,
+            "overlay_file": overlay_file_path,
             "image": encoded_overlay,
             "detected_conditions": detected_conditions,
+            "findings": [{k: v for k, v in finding.items() if k != "mask_rle"} for finding in findings],
             "task_id": new_radiograph.tasks,
             "created_at": new_radiograph.created_at,
+            "radiograph_id": new_radiograph.id,
         }
     except Exception as e:
         status_detection = "failed"
         logger.error(f"Prediction failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+def stored_rle_masks(radiograph: Radiograph):
+    """Condition -> RLE mask from the findings, or None when the row predates RLE findings."""
+    if not radiograph.findings:
+        # A prediction that detected nothing stores no findings and has nothing to paint;
+        # a row flagged with detections but no findings predates findings and needs the PNG
+        detected = (radiograph.has_impaksi, radiograph.has_karies, radiograph.has_lesi_periapikal, radiograph.has_resorpsi)
+        return None if any(detected) else {}
+    if not all(finding.mask_rle for finding in radiograph.findings):
+        return None
+    return {finding.condition: finding.mask_rle for finding in radiograph.findings}
+
 async def filter_radiograph(radiograph_id: int, selected_categories: List[str], db: Session, current_user: User) -> Dict:
     try:
-        radiograph = db.query(Radiograph).filter(Radiograph.id == radiograph_id).first()
+        storage = get_storage()
+        with observe_stage("db", "get_radiograph"):
+            radiograph = db.query(Radiograph).filter(Radiograph.id == radiograph_id).first()
         if not radiograph:
             raise HTTPException(status_code=404, detail="Radiograph not found")
-        if not radiograph.mask_file or not os.path.exists(radiograph.mask_file):
+        if not radiograph.mask_file or not storage.exists(radiograph.mask_file):
             raise HTTPException(status_code=404, detail="Mask file not found")
-        if not radiograph.original or not os.path.exists(radiograph.original):
+        if not radiograph.original or not storage.exists(radiograph.original):
             raise HTTPException(status_code=404, detail="Original image not found")
         # Always pass the original image path, not the overlay
         encoded_filtered_image, message = await apply_filters(
             radiograph.original,  # Use original image
             radiograph.mask_file,
-            selected_categories
+            selected_categories,
+            rle_masks=stored_rle_masks(radiograph),
         )
         return {
             "message": message or "Filter applied successfully",
@@ -123,48 +246,70 @@ def bulk_delete_radiographs(request: BulkDeleteRequest, db: Session, current_use
     try:
         if not request.ids:
             raise HTTPException(status_code=400, detail="No IDs provided for deletion")
-        existing_records = db.query(Radiograph).filter(Radiograph.id.in_(request.ids)).all()
-        existing_ids = {record.id for record in existing_records}
-        non_existent_ids = set(request.ids) - existing_ids
+        requested_ids = list(dict.fromkeys(request.ids))
+        job_id = create_cleanup_job()
+        deleted_count = 0
+        found_ids = set()
+        chunk_size = settings.BULK_DELETE_CHUNK_SIZE
+        try:
+            for start in range(0, len(requested_ids), chunk_size):
+                chunk_ids = requested_ids[start:start + chunk_size]
+                records = (
+                    db.query(Radiograph.id, Radiograph.original, Radiograph.mask_file, Radiograph.overlay)
+                    .filter(Radiograph.id.in_(chunk_ids))
+                    .all()
+                )
+                found_ids.update(record.id for record in records)
+                # Bulk deletes skip ORM cascades, so clear findings explicitly
+                db.query(RadiographFinding).filter(RadiographFinding.radiograph_id.in_(chunk_ids)).delete(synchronize_session=False)
+                deleted_count += (
+                    db.query(Radiograph)
+                    .filter(Radiograph.id.in_(chunk_ids))
+                    .delete(synchronize_session=False)
+                )
+                db.commit()
+                # Files are only queued once their rows are gone for good
+                enqueue_file_removal(
+                    job_id,
+                    [path for record in records for path in Radiograph.artifact_paths(record)],
+                )
+        finally:
+            finish_enqueueing(job_id)
+        non_existent_ids = set(requested_ids) - found_ids
         if non_existent_ids:
             logger.warning(f"Some IDs not found: {non_existent_ids}")
-        for record in existing_records:
-            for file_path in [record.original, record.mask_file, record.overlay]:
-                if file_path and os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                        logger.info(f"Deleted file: {file_path}")
-                    except Exception as e:
-                        logger.warning(f"Failed to delete file {file_path}: {str(e)}")
-        deleted_count = (
-            db.query(Radiograph)
-            .filter(Radiograph.id.in_(request.ids))
-            .delete(synchronize_session=False)
-        )
-        db.commit()
-        logger.info(f"Deleted {deleted_count} radiograph records")
+        logger.info(f"Deleted {deleted_count} radiograph records, file cleanup job {job_id}")
         return {
             "message": "Bulk deletion successful",
             "deleted_count": deleted_count,
             "non_existent_ids": list(non_existent_ids) if non_existent_ids else None,
+            "job_id": job_id,
         }
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"Failed to delete radiographs: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to delete radiographs: {str(e)}")
 
+def get_bulk_delete_job(job_id: str, db: Session, current_user: User) -> Dict:
+    job = get_cleanup_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    return job
+
 def delete_radiograph(id: int, db: Session, current_user: User) -> Dict:
     try:
         record = db.query(Radiograph).filter(Radiograph.id == id).first()
         if not record:
             raise HTTPException(status_code=404, detail="Radiograph not found")
-        for file_path in [record.original, record.mask_file, record.overlay]:
-            if file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.info(f"Deleted file: {file_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete file {file_path}: {str(e)}")
+        storage = get_storage()
+        for file_path in Radiograph.artifact_paths(record):
+            try:
+                storage.delete(file_path)
+                logger.info(f"Deleted file: {file_path}")
+            except Exception as e:
+                logger.warning(f"Failed to delete file {file_path}: {str(e)}")
         db.delete(record)
         db.commit()
         logger.info(f"Deleted radiograph with ID: {id}")
@@ -172,4 +317,19 @@ def delete_radiograph(id: int, db: Session, current_user: User) -> Dict:
     except Exception as e:
         db.rollback()
         logger.error(f"Failed to delete radiograph: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to delete radiograph: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to delete radiograph: {str(e)}")
+
+ARTIFACT_COLUMNS = {"original": "original", "mask": "mask_file", "overlay": "overlay"}
+
+def get_radiograph_file_url(id: int, kind: str, db: Session, current_user: User) -> str:
+    if kind not in ARTIFACT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unknown file kind: {kind}")
+    record = db.query(Radiograph).filter(Radiograph.id == id).first()
+    if not record:
+        raise HTTPException(status_code=404, detail="Radiograph not found")
+    key = getattr(record, ARTIFACT_COLUMNS[kind])
+    storage = get_storage()
+    # Listings and /predict return stored keys unchecked; a missing file surfaces here, once per fetch
+    if not key or not storage.exists(key):
+        raise HTTPException(status_code=404, detail="File not found")
+    return storage.url(key)
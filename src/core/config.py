@@ -11,6 +11,116 @@ class Settings(BaseSettings):
     APP_HOST: str = "127.0.0.1"
     APP_PORT: int = 8000
 
+    # Production launcher (python -m src.server)
+    WEB_CONCURRENCY: int = 2
+    SERVER_TIMEOUT: int = 120
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_KEEPALIVE: int = 5
+    SERVER_MAX_REQUESTS: int = 0
+    SERVER_PRELOAD_MODEL: bool = True
+
+    # Database connection pool (per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Bulk deletion
+    BULK_DELETE_CHUNK_SIZE: int = 500
+    FILE_CLEANUP_WORKERS: int = 8
+    FILE_CLEANUP_MAX_RETRIES: int = 3
+    FILE_CLEANUP_RETRY_BACKOFF: float = 0.5
+    FILE_CLEANUP_JOB_RETENTION: int = 100
+    # Job progress is kept in the file_cleanup_jobs table so any worker can report it;
+    # a running job not updated for FILE_CLEANUP_JOB_STALE_SECONDS is reported as interrupted
+    FILE_CLEANUP_PROGRESS_INTERVAL: float = 1.0
+    FILE_CLEANUP_JOB_STALE_SECONDS: int = 600
+
+    # Orphaned upload artifact GC (interval 0 disables the scheduled job)
+    ARTIFACT_GC_INTERVAL_SECONDS: int = 0
+    ARTIFACT_GC_BATCH_SIZE: int = 200
+    ARTIFACT_GC_BATCH_PAUSE: float = 0.5
+    ARTIFACT_GC_MAX_DELETIONS: int = 5000
+    ARTIFACT_GC_MIN_AGE_SECONDS: int = 3600
+
+    # Artifact storage: "local" or "s3" (any S3-compatible endpoint, e.g. MinIO)
+    STORAGE_BACKEND: str = "local"
+    STORAGE_LOCAL_ROOT: str = "."
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PRESIGN_EXPIRES: int = 3600
+
+    # Inference engine: "keras", "onnx" or "tflite"
+    INFERENCE_BACKEND: str = "keras"
+    MODEL_PATH: str = "src/ml_models/unet_gigi_penyakit_crop_256_512.h5"
+    ONNX_MODEL_PATH: str = "src/ml_models/unet_gigi_penyakit_crop_256_512.onnx"
+    TFLITE_MODEL_PATH: str = "src/ml_models/unet_gigi_penyakit_crop_256_512.tflite"
+    # Quantized variants ("float16" or "int8") are served through the tflite backend
+    MODEL_VARIANT: str = "float32"
+    TFLITE_FLOAT16_MODEL_PATH: str = "src/ml_models/unet_gigi_penyakit_crop_256_512_float16.tflite"
+    TFLITE_INT8_MODEL_PATH: str = "src/ml_models/unet_gigi_penyakit_crop_256_512_int8.tflite"
+    # Decode uploads at 1/2, 1/4 or 1/8 scale when that still covers the model input
+    INFERENCE_REDUCED_DECODE: bool = True
+    # Preallocated float32 model input tensors; extra concurrent requests allocate their own
+    INFERENCE_INPUT_BUFFERS: int = 4
+    INFERENCE_TF_FUNCTION: bool = True
+    INFERENCE_XLA: bool = False
+    INFERENCE_WARMUP_ON_STARTUP: bool = True
+    # Thread counts for whichever process runs the model (0 = engine default)
+    INFERENCE_INTRA_OP_THREADS: int = 0
+    INFERENCE_INTER_OP_THREADS: int = 0
+    # Dedicated inference worker processes (0 = run the model in the API process).
+    # The pool is per API process: src.server runs WEB_CONCURRENCY pools, i.e.
+    # WEB_CONCURRENCY * INFERENCE_WORKERS model copies, and "auto" affinity splits
+    # the cores across all of them
+    INFERENCE_WORKERS: int = 0
+    INFERENCE_WORKER_OPENCV_THREADS: int = 1
+    INFERENCE_WORKER_BLAS_THREADS: int = 1
+    # "" = no pinning, "auto" = split cores evenly, or per-worker sets like "0-3;4-7"
+    INFERENCE_WORKER_CPU_AFFINITY: str = ""
+    # Pass input patches and class indices to workers through shared memory instead of pickling
+    INFERENCE_SHARED_MEMORY: bool = True
+    # Ring slots; 0 means two per worker. Further concurrent requests fall back to pickling
+    INFERENCE_SHM_SLOTS: int = 0
+    # A slot leased longer than this without being handed to a worker is logged and
+    # reclaimed as leaked; slots queued in or running on the pool are never reclaimed
+    INFERENCE_SHM_LEASE_SECONDS: float = 120.0
+    # OpenCV threads in the API process (0 = OpenCV default)
+    OPENCV_THREADS: int = 0
+
+    # Admission control for /predict (per server process): concurrent predictions
+    # (0 = twice INFERENCE_WORKERS, at least 2), how many more may wait, the memory
+    # their estimated working sets may use, and the longest a request may queue
+    INFERENCE_MAX_CONCURRENT: int = 0
+    INFERENCE_ADMISSION_QUEUE_DEPTH: int = 16
+    INFERENCE_MEMORY_BUDGET_MB: int = 1024
+    INFERENCE_ADMISSION_TIMEOUT: float = 30.0
+    # Fair scheduling of queued predictions: a user's first N outstanding predictions
+    # are interactive (served before bulk), at most M may queue per user (0 = no cap),
+    # and each deficit round robin turn credits a user this much estimated work
+    INFERENCE_INTERACTIVE_PER_USER: int = 1
+    INFERENCE_MAX_QUEUED_PER_USER: int = 8
+    INFERENCE_FAIR_QUANTUM_MB: int = 64
+
+    # Idempotency-Key handling for /predict: how long a completed response is replayed,
+    # how long an in-flight claim is honoured before it counts as abandoned, and how
+    # long a retry waits on a request still running in another worker
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_IN_PROGRESS_TIMEOUT: int = 600
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0
+    IDEMPOTENCY_POLL_INTERVAL: float = 0.5
+    IDEMPOTENCY_PURGE_INTERVAL: float = 300.0
+
+    # On-demand request profiling for super admins (off unless explicitly enabled)
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 50
+    PROFILE_SAMPLING_INTERVAL: float = 0.001
+
     class Config:
         env_file = ".env" 
 
@@ -0,0 +1,119 @@
+# src/core/metrics.py
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Stage timings range from sub-millisecond lookups to multi-second inference
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_LATENCY = Histogram(
+    "radiograph_stage_duration_seconds",
+    "Time spent in each stage of the prediction, filter and database pipelines",
+    ["pipeline", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+REQUEST_COUNT = Counter(
+    "radiograph_http_requests_total",
+    "HTTP requests by route and status code",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "radiograph_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+    buckets=STAGE_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "radiograph_http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+MODEL_QUEUE_DEPTH = Gauge(
+    "radiograph_model_queue_depth",
+    "Prediction requests waiting for or running model inference",
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_REJECTED = Counter(
+    "radiograph_inference_admission_rejected_total",
+    "Prediction requests shed by admission control",
+    ["reason"],
+)
+ADMISSION_WAIT = Histogram(
+    "radiograph_inference_admission_wait_seconds",
+    "Time a prediction waited in the admission queue before starting",
+    buckets=STAGE_BUCKETS,
+)
+# Per lane only: a user_id label would add a series per user, lane and bucket in every
+# process; per-user waits are in inference_admission.stats() on /health/inference
+ADMISSION_LANE_WAIT = Histogram(
+    "radiograph_inference_lane_wait_seconds",
+    "Admission queue wait per scheduling lane",
+    ["lane"],
+    buckets=STAGE_BUCKETS,
+)
+ADMISSION_RUNNING_BYTES = Gauge(
+    "radiograph_inference_admission_running_bytes",
+    "Estimated memory held by predictions currently running",
+    multiprocess_mode="livesum",
+)
+
+
+@contextmanager
+def observe_stage(pipeline: str, stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(pipeline, stage).observe(time.perf_counter() - start)
+
+
+def render_metrics() -> bytes:
+    # Aggregate across worker processes when running under a multi-process server
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests, in-flight requests and latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # Use the matched route template so path parameters don't explode label cardinality
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_COUNT.labels(method, route_path, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route_path).observe(time.perf_counter() - start)
+
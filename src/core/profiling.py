@@ -0,0 +1,208 @@
+# src/core/profiling.py
+import os
+import re
+import time
+import uuid
+import pstats
+import asyncio
+import cProfile
+import logging
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+from fastapi import HTTPException
+from src.core.config import settings
+from src.db.session import SessionLocal
+from src.utils.dependencies import resolve_token_user
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_FORMATS = {"pstats": ".pstats", "speedscope": ".speedscope.json", "html": ".html"}
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Only one profiler can be attached to the event loop thread at a time
+_profiling_active = False
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+except ImportError:
+    SamplingProfiler = None
+
+
+def _normalize_format(value: str) -> str:
+    value = value.strip().lower()
+    return "pstats" if value in ("", "1", "true", "yes") else value
+
+
+def _requested_format(scope) -> Optional[str]:
+    """Return the requested profile format, or None if the request did not ask for one."""
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return _normalize_format(value.decode("latin-1"))
+    query_string = scope.get("query_string", b"")
+    if query_string and PROFILE_QUERY_PARAM.encode() in query_string:
+        values = parse_qs(query_string.decode("latin-1"), keep_blank_values=True).get(PROFILE_QUERY_PARAM)
+        if values:
+            return _normalize_format(values[0])
+    return None
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" and token else None
+    return None
+
+
+def _token_is_super_admin(token: str) -> bool:
+    # Same checks as get_current_super_admin: not revoked, user still exists and is still super_admin
+    db = SessionLocal()
+    try:
+        return resolve_token_user(db, token).role == "super_admin"
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+async def _is_super_admin(scope) -> bool:
+    token = _bearer_token(scope)
+    if token is None:
+        return False
+    return await asyncio.to_thread(_token_is_super_admin, token)
+
+
+def _enforce_retention() -> None:
+    entries = sorted(
+        (entry for entry in os.scandir(settings.PROFILE_DIR) if entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in entries[: max(len(entries) - settings.PROFILE_MAX_FILES, 0)]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    for extension in PROFILE_FORMATS.values():
+        path = os.path.join(settings.PROFILE_DIR, f"{profile_id}{extension}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def list_profiles() -> List[Dict]:
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(settings.PROFILE_DIR):
+        if not entry.is_file():
+            continue
+        profile_id, _, extension = entry.name.partition(".")
+        stat = entry.stat()
+        profiles.append(
+            {
+                "id": profile_id,
+                "format": next((name for name, ext in PROFILE_FORMATS.items() if ext == f".{extension}"), extension),
+                "size": stat.st_size,
+                "created_at": stat.st_mtime,
+            }
+        )
+    return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in per-request profiler for super admins.
+    Send `X-Profile: <pstats|speedscope|html>` (or `?profile=<format>`) with a
+    super_admin bearer token; the profile id comes back in `X-Profile-Id`.
+    Requests without the flag only pay for a header scan. pstats uses cProfile;
+    speedscope and html use pyinstrument's sampling profiler when installed.
+
+    Both profile the event-loop thread only. Work the request hands to the
+    threadpool, the executor or inference worker processes (most of /predict)
+    shows up as time spent awaiting, and with pstats any other request served
+    concurrently on the same loop is recorded too. Profile on an otherwise idle
+    worker, and use the stage histograms on /metrics for time inside the pool.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        profile_format = _requested_format(scope)
+        if profile_format is None or profile_format not in PROFILE_FORMATS or not await _is_super_admin(scope):
+            await self.app(scope, receive, send)
+            return
+        global _profiling_active
+        if _profiling_active:
+            logger.warning(f"Another request is being profiled, serving {scope['path']} unprofiled")
+            await self.app(scope, receive, send)
+            return
+        if profile_format != "pstats" and SamplingProfiler is None:
+            logger.warning(f"pyinstrument is not installed, falling back to pstats for {profile_format} profile")
+            profile_format = "pstats"
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        _profiling_active = True
+        started = time.perf_counter()
+        try:
+            await self._run_profiled(profile_id, profile_format, scope, receive, send_wrapper)
+        finally:
+            _profiling_active = False
+        logger.info(
+            f"Profiled {scope['method']} {scope['path']} in {time.perf_counter() - started:.3f}s as {profile_id}"
+        )
+
+    async def _run_profiled(self, profile_id: str, profile_format: str, scope, receive, send) -> None:
+        if profile_format == "pstats":
+            # Deterministic, but attached to the whole loop thread: see the class docstring
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.disable()
+                self._save(profile_id, profile_format, profiler=profiler)
+        else:
+            profiler = SamplingProfiler(interval=settings.PROFILE_SAMPLING_INTERVAL, async_mode="enabled")
+            profiler.start()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.stop()
+                self._save(profile_id, profile_format, profiler=profiler)
+
+    @staticmethod
+    def _save(profile_id: str, profile_format: str, profiler) -> None:
+        try:
+            os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+            path = os.path.join(settings.PROFILE_DIR, f"{profile_id}{PROFILE_FORMATS[profile_format]}")
+            if profile_format == "pstats":
+                pstats.Stats(profiler).dump_stats(path)
+            elif profile_format == "speedscope":
+                with open(path, "w") as file_object:
+                    file_object.write(profiler.output(renderer=SpeedscopeRenderer()))
+            else:
+                with open(path, "w") as file_object:
+                    file_object.write(profiler.output(renderer=HTMLRenderer()))
+            _enforce_retention()
+        except Exception as e:
+            logger.error(f"Failed to save profile {profile_id}: {str(e)}")
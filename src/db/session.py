@@ -1,13 +1,119 @@
+import os
+import threading
+import time
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.pool import QueuePool
 from src.core.config import settings
 
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait to check out a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeout_count = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeout_count += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.wait_count += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def recreate(self):
+        # Keep the counters when the pool is recreated (e.g. after invalidation)
+        new_pool = super().recreate()
+        new_pool.wait_count = self.wait_count
+        new_pool.wait_total = self.wait_total
+        new_pool.wait_max = self.wait_max
+        new_pool.timeout_count = self.timeout_count
+        return new_pool
+
+
+def _engine_kwargs() -> dict:
+    # SQLite uses its own pool implementations and rejects the QueuePool options
+    if settings.DATABASE_URL.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 # Create the SQLAlchemy engine
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs())
+
+if settings.DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        # SQLite ignores foreign keys (and so ON DELETE CASCADE) unless enabled per connection;
+        # without it a deleted radiograph leaves findings behind for the next row reusing its id
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Base class for all models
 Base = declarative_base()
+
+_invalidated_connections = 0
+
+
+@event.listens_for(engine, "invalidate")
+def _count_invalidated(dbapi_connection, connection_record, exception):
+    global _invalidated_connections
+    _invalidated_connections += 1
+
+
+def get_pool_status() -> dict:
+    """Snapshot of the connection pool for this worker process."""
+    pool = engine.pool
+    status = {
+        "pid": os.getpid(),
+        "pool_class": type(pool).__name__,
+        "invalidated": _invalidated_connections,
+    }
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "pool_size": pool.size(),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "timeout": settings.DB_POOL_TIMEOUT,
+                "recycle": settings.DB_POOL_RECYCLE,
+                "pre_ping": settings.DB_POOL_PRE_PING,
+            }
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._stats_lock:
+            status.update(
+                {
+                    "wait_count": pool.wait_count,
+                    "wait_avg_ms": round(pool.wait_total / pool.wait_count * 1000, 3) if pool.wait_count else 0.0,
+                    "wait_max_ms": round(pool.wait_max * 1000, 3),
+                    "checkout_timeouts": pool.timeout_count,
+                }
+            )
+    return status
@@ -2,10 +2,23 @@ from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.staticfiles import StaticFiles
-from starlette.responses import FileResponse
+from starlette.responses import FileResponse, Response
 from src.routes.v1.api import api_router
+from src.routes.health import router as health_router
 from src.core.config import settings
 from src.db.session import engine, Base
+from prometheus_client import CONTENT_TYPE_LATEST
+from src.core.metrics import MetricsMiddleware, render_metrics
+from src.core.profiling import ProfilingMiddleware
+from src.services.file_cleanup_service import shutdown_cleanup_executor
+from src.services.artifact_gc_service import run_periodic_collection
+from src.services.inference_service import warm_up_inference, shutdown_inference
+from src.services.storage_service import get_storage
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -20,6 +33,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts, latency and in-flight gauge for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in per-request profiles for super admins (X-Profile header or ?profile=)
+app.add_middleware(ProfilingMiddleware)
+
 # Custom StaticFiles class to add CORS headers
 class CORSStaticFiles(StaticFiles):
     async def get_response(self, path: str, scope: dict) -> FileResponse:
@@ -27,20 +46,49 @@ class CORSStaticFiles(StaticFiles):
         response.headers["Access-Control-Allow-Origin"] = "http://localhost:5173"
         return response
 
-# Mount static files with CORS support
-app.mount(
-    "/uploads",
-    CORSStaticFiles(directory="uploads", html=False),
-    name="uploads"
-)
+# Mount static files with CORS support (S3 storage serves presigned URLs instead)
+if settings.STORAGE_BACKEND == "local":
+    app.mount(
+        "/uploads",
+        CORSStaticFiles(directory=os.path.join(settings.STORAGE_LOCAL_ROOT, "uploads"), html=False, check_dir=False),
+        name="uploads"
+    )
 
 app.include_router(api_router, prefix="/api/v1")
+app.include_router(health_router, prefix="/health")
+
+async def _load_inference_in_background():
+    try:
+        await asyncio.to_thread(warm_up_inference)
+    except Exception as e:
+        logger.error(f"Inference backend failed to load: {str(e)}")
 
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
+    # Upload directories are created once here instead of on every request
+    get_storage().prepare()
     print("Creating database tables if they don't exist...")
     Base.metadata.create_all(bind=engine)
+    if settings.INFERENCE_WARMUP_ON_STARTUP:
+        # Load and trace the model off the startup path; non-inference routes serve
+        # immediately and /health/inference reports when /predict is ready
+        app.state.inference_warmup_task = asyncio.create_task(_load_inference_in_background())
+    if settings.ARTIFACT_GC_INTERVAL_SECONDS > 0:
+        app.state.artifact_gc_task = asyncio.create_task(run_periodic_collection())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    gc_task = getattr(app.state, "artifact_gc_task", None)
+    if gc_task is not None:
+        gc_task.cancel()
+    # Let queued file removals finish before the worker exits
+    await asyncio.to_thread(shutdown_cleanup_executor)
+    await asyncio.to_thread(shutdown_inference)
 
 @app.get("/")
 def root():
-    return {"message": f"Welcome to {settings.PROJECT_NAME}"}
\ No newline at end of file
+    return {"message": f"Welcome to {settings.PROJECT_NAME}"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
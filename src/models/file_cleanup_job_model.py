@@ -0,0 +1,19 @@
+# src/models/file_cleanup_job_model.py
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Boolean
+from sqlalchemy.sql import func
+from src.db.base import Base
+
+class FileCleanupJob(Base):
+    """Progress of a bulk delete's background file removal, readable from every worker."""
+    __tablename__ = "file_cleanup_jobs"
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String(30), nullable=False, default="running")
+    queued_files = Column(Integer, nullable=False, default=0)
+    deleted_files = Column(Integer, nullable=False, default=0)
+    failed_files = Column(JSON, nullable=False, default=list)
+    # Set once the request has queued its last chunk; the job finishes when nothing is pending after that
+    queued_all = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True, index=True)
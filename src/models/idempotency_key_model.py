@@ -0,0 +1,20 @@
+# src/models/idempotency_key_model.py
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from src.db.base import Base
+
+class IdempotencyKey(Base):
+    """A client-supplied Idempotency-Key and the outcome of the request it first arrived with."""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    # Hash of the request the key was first used with; a different request under the same key is rejected
+    request_fingerprint = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default="in_progress")
+    radiograph_id = Column(Integer, ForeignKey("radiographs.id", ondelete="SET NULL"), nullable=True)
+    response = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
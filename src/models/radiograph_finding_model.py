@@ -0,0 +1,25 @@
+# src/models/radiograph_finding_model.py
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from src.db.base import Base
+
+class RadiographFinding(Base):
+    """Region statistics for one detected condition, computed once when the mask is predicted."""
+    __tablename__ = "radiograph_findings"
+    __table_args__ = (UniqueConstraint("radiograph_id", "condition", name="uq_radiograph_findings_condition"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    radiograph_id = Column(Integer, ForeignKey("radiographs.id", ondelete="CASCADE"), nullable=False, index=True)
+    condition = Column(String(50), nullable=False)
+    pixel_area = Column(Integer, nullable=False)
+    area_ratio = Column(Float, nullable=False)
+    component_count = Column(Integer, nullable=False)
+    # Per connected component, largest first, in original-image pixels: [x, y, width, height] / [x, y]
+    bounding_boxes = Column(JSON, nullable=False)
+    centroids = Column(JSON, nullable=False)
+    # COCO-style run-length mask of the condition (see src/services/mask_rle.py)
+    mask_rle = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    radiograph = relationship("Radiograph", back_populates="findings")
@@ -1,8 +1,9 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum
 from sqlalchemy.sql import func
 from src.db.base import Base
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session, relationship
+from src.models.radiograph_finding_model import RadiographFinding
 
 class Radiograph(Base):
     __tablename__ = "radiographs"
@@ -10,12 +11,13 @@ class Radiograph(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     tasks = Column(String(50), unique=True, nullable=False)
     patient_name = Column(String(255), nullable=False)
-    original = Column(String(255), nullable=False)
+    # Indexed for the artifact GC, which looks stored files up by path
+    original = Column(String(255), nullable=False, index=True)
     status_detection = Column(
         Enum("success", "in progress", "failed", name="status_enum"), nullable=False
     )
-    mask_file = Column(String(255), nullable=True) 
-    overlay = Column(String(255), nullable=True)
+    mask_file = Column(String(255), nullable=True, index=True)
+    overlay = Column(String(255), nullable=True, index=True)
     has_lesi_periapikal = Column(Boolean, default=False)
     has_resorpsi = Column(Boolean, default=False)
     has_karies = Column(Boolean, default=False)
@@ -23,6 +25,19 @@ class Radiograph(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    findings = relationship(
+        "RadiographFinding",
+        back_populates="radiograph",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="RadiographFinding.condition",
+    )
+
+    @staticmethod
+    def artifact_paths(record) -> List[str]:
+        """Files on disk that belong to a radiograph (ORM instance or column row)."""
+        return [path for path in (record.original, record.mask_file, record.overlay) if path]
+
     @staticmethod
     def generate_task_id(db: Session) -> str:
         last_task = db.query(Radiograph).order_by(Radiograph.id.desc()).first()
@@ -38,6 +53,7 @@ class Radiograph(Base):
         status_detection: str,
         mask_file: Optional[str] = None,
         overlay: Optional[str] = None,
+        findings: Optional[List[Dict]] = None,
         **kwargs,
     ):
         task_id = cls.generate_task_id(db)
@@ -50,6 +66,8 @@ class Radiograph(Base):
             overlay=overlay,
             **kwargs,
         )
+        # Findings are inserted in the same commit as their radiograph
+        new_radiograph.findings = [RadiographFinding(**finding) for finding in findings or []]
         db.add(new_radiograph)
         db.commit()
         db.refresh(new_radiograph)
@@ -0,0 +1,59 @@
+# src/routes/health.py
+import asyncio
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from src.db.session import engine
+from src.services.inference_service import inference_status
+from src.services.admission_service import inference_admission
+
+router = APIRouter(tags=["health"])
+
+DB_CHECK_TIMEOUT_SECONDS = 2.0
+
+
+def _ping_database() -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def _database_status() -> dict:
+    try:
+        await asyncio.wait_for(asyncio.to_thread(_ping_database), timeout=DB_CHECK_TIMEOUT_SECONDS)
+        return {"ok": True, "error": None}
+    except Exception as e:
+        return {"ok": False, "error": str(e) or type(e).__name__}
+
+
+@router.get("/live")
+def liveness():
+    # The process is up and the event loop is responsive
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness():
+    inference = inference_status()
+    database = await _database_status()
+    ready = inference["ready"] and database["ok"]
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "model_loaded": inference["status"] in ("loaded", "ready"),
+            "model_warmed_up": inference["status"] == "ready",
+            "database": database,
+            "inference_queue_depth": inference["queue_depth"],
+            "inference": inference,
+        },
+    )
+
+
+@router.get("/inference")
+def inference_health():
+    # Reported separately so auth/category traffic can be routed before the model is up
+    report = {**inference_status(), "admission": inference_admission.stats()}
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if report["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=report,
+    )
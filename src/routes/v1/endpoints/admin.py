@@ -0,0 +1,27 @@
+# src/routes/v1/endpoints/admin.py
+from fastapi import APIRouter, Depends
+from src.utils.dependencies import get_current_super_admin
+from src.controllers.admin_controller import get_db_pool_stats, get_profiles, download_profile
+from src.handlers.response_handler import ResponseSchema
+from src.models.user_model import User
+
+router = APIRouter(tags=["admin"])
+
+@router.get("/db-pool", response_model=ResponseSchema)
+async def get_db_pool_stats_endpoint(
+    current_user: User = Depends(get_current_super_admin),
+):
+    return get_db_pool_stats()
+
+@router.get("/profiles", response_model=ResponseSchema)
+async def get_profiles_endpoint(
+    current_user: User = Depends(get_current_super_admin),
+):
+    return get_profiles()
+
+@router.get("/profiles/{profile_id}")
+async def download_profile_endpoint(
+    profile_id: str,
+    current_user: User = Depends(get_current_super_admin),
+):
+    return download_profile(profile_id)
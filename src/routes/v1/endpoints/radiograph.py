@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, File, Form, UploadFile, Query
+from fastapi import APIRouter, Depends, File, Form, Header, UploadFile, Query
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional
 from src.utils.dependencies import get_db, get_current_user
-from src.controllers.radiograph_controller import get_radiographs, predict_radiograph, filter_radiograph, bulk_delete_radiographs, delete_radiograph
+from src.controllers.radiograph_controller import get_radiographs, predict_radiograph, filter_radiograph, bulk_delete_radiographs, get_bulk_delete_job, delete_radiograph, get_radiograph_file_url, get_radiograph_findings
 from src.models.user_model import User
-from src.schemas.radiograph_schema import FilterResponse, PredictResponse
+from src.schemas.radiograph_schema import FilterResponse, PredictResponse, RadiographFindingsResponse, RadiographListResponse
 from pydantic import BaseModel
 
 router = APIRouter(tags=["radiograph"])
@@ -16,7 +17,7 @@ class FilterRequest(BaseModel):
     radiograph_id: int
     selected_categories: List[str]
 
-@router.get("/data", response_model=dict)
+@router.get("/data", response_model=RadiographListResponse, response_class=ORJSONResponse)
 async def get_radiographs_endpoint(
     page: int = Query(1, ge=1, description="Page number, starting from 1"),
     limit: int = Query(10, ge=1, le=100, description="Number of items per page"),
@@ -29,10 +30,14 @@ async def get_radiographs_endpoint(
 async def predict_radiograph_endpoint(
     file: UploadFile = File(...),
     patient_name: str = Form(..., min_length=1),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    priority: Optional[Literal["interactive", "bulk"]] = Header(None, alias="X-Request-Priority"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return await predict_radiograph(file, patient_name, db, current_user)
+    # Retries carrying the same Idempotency-Key get the first request's response;
+    # batch uploaders send X-Request-Priority: bulk to queue behind interactive work
+    return await predict_radiograph(file, patient_name, db, current_user, idempotency_key, priority)
 
 @router.post("/filter", response_model=FilterResponse, status_code=200)
 async def filter_radiograph_endpoint(
@@ -43,13 +48,40 @@ async def filter_radiograph_endpoint(
     return await filter_radiograph(request.radiograph_id, request.selected_categories, db, current_user)
 
 @router.delete("/bulk", status_code=200)
-async def bulk_delete_radiographs_endpoint(
+def bulk_delete_radiographs_endpoint(
     request: BulkDeleteRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    # Plain def: the chunked deletes are blocking DB work, so FastAPI runs this in its threadpool
     return bulk_delete_radiographs(request, db, current_user)
 
+@router.get("/bulk/{job_id}", status_code=200)
+async def get_bulk_delete_job_endpoint(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return get_bulk_delete_job(job_id, db, current_user)
+
+@router.get("/{id}/findings", response_model=RadiographFindingsResponse, response_class=ORJSONResponse, status_code=200)
+async def get_radiograph_findings_endpoint(
+    id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return get_radiograph_findings(id, db, current_user)
+
+@router.get("/{id}/files/{kind}", status_code=307)
+async def get_radiograph_file_endpoint(
+    id: int,
+    kind: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Redirects to the static path (local storage) or a presigned URL (S3)
+    return RedirectResponse(get_radiograph_file_url(id, kind, db, current_user), status_code=307)
+
 @router.delete("/{id}", status_code=200)
 async def delete_radiograph_endpoint(
     id: int,
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class RadiographBase(BaseModel):
     patient_name: str
@@ -15,6 +15,52 @@ class FilterResponse(BaseModel):
     filtered_image: str
     selected_categories: list[str]
 
+class RadiographFinding(BaseModel):
+    condition: str
+    pixel_area: int
+    area_ratio: float
+    component_count: int
+    bounding_boxes: List[List[int]]
+    centroids: List[List[float]]
+
+    class Config:
+        from_attributes = True
+
+class RadiographFindingsResponse(BaseModel):
+    radiograph_id: int
+    findings: List[RadiographFinding]
+
+class DetectedConditions(BaseModel):
+    has_impaksi: bool = False
+    has_karies: bool = False
+    has_lesi_periapikal: bool = False
+    has_resorpsi: bool = False
+
+class RadiographListItem(BaseModel):
+    id: int
+    patient_name: str
+    status_detection: str
+    original_file: Optional[str] = None
+    mask_file: Optional[str] = None
+    overlay_file: Optional[str] = None
+    detected_conditions: DetectedConditions
+    findings: List[RadiographFinding] = []
+    task_id: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class Pagination(BaseModel):
+    total: int
+    page: int
+    limit: int
+    total_pages: int
+
+class RadiographListResponse(BaseModel):
+    data: List[RadiographListItem]
+    pagination: Pagination
+
 class Radiograph(RadiographBase):
     id: int
     tasks: str
@@ -40,4 +86,5 @@ class PredictResponse(BaseModel):
     overlay_file: Optional[str] = None
     image: Optional[str] = None
     detected_conditions: dict
+    findings: List[RadiographFinding] = []
     task_id: str
\ No newline at end of file
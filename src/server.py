@@ -0,0 +1,117 @@
+# src/server.py
+"""
+Production launcher: a gunicorn master with uvicorn workers.
+
+    python -m src.server
+    python -m src.server --workers 4 --bind 0.0.0.0:8000
+
+The app, its lookup tables and (for the tflite engine) the model buffer are
+loaded once in the master and inherited copy-on-write by the forked workers.
+Send SIGHUP to the master for a graceful worker reload (the model file is
+re-read first), SIGTERM for a graceful shutdown.
+"""
+import argparse
+import gc
+import os
+import shutil
+import tempfile
+from gunicorn.app.base import BaseApplication
+from src.core.config import settings
+
+# Forked copies of TensorFlow / ONNX Runtime sessions are not safe to use;
+# TFLite is built from a plain bytes buffer, which forks cleanly
+FORK_SAFE_PRELOAD_BACKENDS = ("tflite",)
+
+
+def _prepare_metrics_dir() -> None:
+    # prometheus_client needs a shared directory to aggregate metrics across workers
+    metrics_dir = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "radiograph-metrics")
+    )
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def _preload_model() -> None:
+    from src.services.inference_service import model_path_for, preload_model_content
+
+    if not settings.SERVER_PRELOAD_MODEL or settings.INFERENCE_WORKERS > 0:
+        return
+    if settings.INFERENCE_BACKEND not in FORK_SAFE_PRELOAD_BACKENDS:
+        print(f"Model preload skipped: the {settings.INFERENCE_BACKEND} engine is not fork-safe, each worker loads its own copy")
+        return
+    preload_model_content(model_path_for(settings.INFERENCE_BACKEND, settings.MODEL_VARIANT))
+
+
+def on_reload(arbiter) -> None:
+    # Pick up a replaced model file on SIGHUP before new workers are forked
+    _preload_model()
+
+
+def pre_fork(server, worker) -> None:
+    # Lowest index no live worker holds, so a replacement worker takes over its
+    # predecessor's share of the cores for its inference pool
+    used = {getattr(live, "slot_index", None) for live in server.WORKERS.values()}
+    worker.slot_index = next(index for index in range(len(used) + 1) if index not in used)
+    # Objects created so far are never collected, so GC won't dirty shared pages in workers
+    gc.freeze()
+
+
+def post_fork(server, worker) -> None:
+    # Read by src/services/inference_pool.py when the worker starts its pool
+    os.environ["SERVER_WORKER_INDEX"] = str(worker.slot_index)
+
+
+def child_exit(server, worker) -> None:
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+class RadiographServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Runs once in the master because preload_app is set
+        from src.main import app
+
+        _preload_model()
+        return app
+
+
+def run_server():
+    parser = argparse.ArgumentParser(description="Run the API with multiple preloaded workers")
+    parser.add_argument("--bind", default=f"{settings.APP_HOST}:{settings.APP_PORT}")
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY)
+    parser.add_argument("--timeout", type=int, default=settings.SERVER_TIMEOUT)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT)
+    args = parser.parse_args()
+
+    _prepare_metrics_dir()
+    os.environ["SERVER_WORKER_COUNT"] = str(args.workers)
+    options = {
+        "bind": args.bind,
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "keepalive": settings.SERVER_KEEPALIVE,
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS // 10,
+        "on_reload": on_reload,
+        "pre_fork": pre_fork,
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+    }
+    RadiographServer(options).run()
+
+
+if __name__ == "__main__":
+    run_server()
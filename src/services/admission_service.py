@@ -0,0 +1,318 @@
+# src/services/admission_service.py
+import math
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Optional
+from fastapi import HTTPException
+from src.core.config import settings
+from src.core.metrics import ADMISSION_REJECTED, ADMISSION_WAIT, ADMISSION_RUNNING_BYTES, ADMISSION_LANE_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Rough peak working set of one prediction per original-image pixel: full-resolution
+# RGB decode, class mask, colorized mask, overlay and encode buffers
+PREDICTION_BYTES_PER_PIXEL = 12
+# Patch tensors, the reduced decode and model outputs, independent of image size
+PREDICTION_FIXED_BYTES = 16 * 1024 * 1024
+
+# Completions older than this no longer count towards the drain rate
+DRAIN_WINDOW_SECONDS = 60.0
+MAX_RETRY_AFTER_SECONDS = 120
+
+# Interactive (single, user-facing uploads) is always served before bulk
+INTERACTIVE_LANE = "interactive"
+BULK_LANE = "bulk"
+LANES = (INTERACTIVE_LANE, BULK_LANE)
+
+# Users whose admission waits are kept for stats(), least recently seen dropped first
+MAX_TRACKED_USERS = 256
+TOP_USER_WAITS = 10
+
+
+def estimate_prediction_bytes(width: int, height: int) -> int:
+    return width * height * PREDICTION_BYTES_PER_PIXEL + PREDICTION_FIXED_BYTES
+
+
+class _Waiter:
+    __slots__ = ("cost", "future", "enqueued_at", "user_id", "lane")
+
+    def __init__(self, cost: int, future: asyncio.Future, user_id: int, lane: str):
+        self.cost = cost
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.user_id = user_id
+        self.lane = lane
+
+
+class FairQueue:
+    """
+    Deficit round robin over per-user FIFO queues. Each visit credits a user
+    with `quantum` bytes of estimated work; a user is served while its credit
+    covers the next request, so users with large or many uploads get the same
+    share of admissions as everyone else rather than the whole queue.
+    """
+
+    def __init__(self, quantum: int):
+        if quantum <= 0:
+            # peek() would credit nothing and never find a waiter it can serve
+            raise RuntimeError(f"Fair queue quantum must be positive (INFERENCE_FAIR_QUANTUM_MB), got {quantum} bytes")
+        self.quantum = quantum
+        self.queues: "OrderedDict[int, Deque[_Waiter]]" = OrderedDict()
+        self.deficits: Dict[int, int] = {}
+        self.size = 0
+
+    def push(self, waiter: _Waiter) -> None:
+        if waiter.user_id not in self.queues:
+            self.queues[waiter.user_id] = deque()
+            self.deficits[waiter.user_id] = 0
+        self.queues[waiter.user_id].append(waiter)
+        self.size += 1
+
+    def peek(self) -> Optional[_Waiter]:
+        """The next waiter in DRR order, crediting users as the round passes them."""
+        while self.queues:
+            user_id, queue = next(iter(self.queues.items()))
+            if self.deficits[user_id] >= queue[0].cost:
+                return queue[0]
+            self.deficits[user_id] += self.quantum
+            self.queues.move_to_end(user_id)
+        return None
+
+    def pop(self, waiter: _Waiter) -> None:
+        """Admit the head waiter returned by peek(), charging its cost to its user's credit."""
+        self.deficits[waiter.user_id] -= waiter.cost
+        self.remove(waiter)
+
+    def remove(self, waiter: _Waiter) -> None:
+        """Drop a waiter without charging its user, e.g. one cancelled or timed out while queued."""
+        queue = self.queues[waiter.user_id]
+        if queue[0] is waiter:
+            queue.popleft()
+        else:
+            queue.remove(waiter)
+        self.size -= 1
+        if not queue:
+            # Idle users do not bank credit
+            del self.queues[waiter.user_id]
+            del self.deficits[waiter.user_id]
+
+    def queued_for(self, user_id: int) -> int:
+        return len(self.queues.get(user_id, ()))
+
+
+class InferenceAdmission:
+    """
+    Per-process admission control for predictions. At most max_concurrent run at
+    once and their estimated memory stays within memory_budget; up to max_queue
+    more wait, the interactive lane ahead of the bulk lane and users within a
+    lane in deficit round robin order. Anything beyond that, or anything that
+    would not start within timeout at the current drain rate, is rejected
+    immediately with a Retry-After hint instead of piling onto the heap.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        memory_budget: int,
+        timeout: float,
+        max_queued_per_user: int = 0,
+        quantum: int = PREDICTION_FIXED_BYTES,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.memory_budget = memory_budget
+        self.timeout = timeout
+        self.max_queued_per_user = max_queued_per_user
+        self.running = 0
+        self.running_bytes = 0
+        self.lanes = {lane: FairQueue(quantum) for lane in LANES}
+        self._running_by_user: Dict[int, int] = {}
+        self._completions: Deque[float] = deque()
+        # user_id -> [predictions admitted, total wait, max wait]
+        self._user_waits: "OrderedDict[int, List[float]]" = OrderedDict()
+        # Smoothed run time of one prediction, used before any completions are seen
+        self._service_seconds = 5.0
+
+    def _fits(self, cost: int) -> bool:
+        if self.running >= self.max_concurrent:
+            return False
+        # A request larger than the whole budget may still run, but only on its own
+        return self.running == 0 or self.running_bytes + cost <= self.memory_budget
+
+    @property
+    def queued(self) -> int:
+        return sum(queue.size for queue in self.lanes.values())
+
+    def _start(self, cost: int, user_id: int) -> None:
+        self.running += 1
+        self.running_bytes += cost
+        self._running_by_user[user_id] = self._running_by_user.get(user_id, 0) + 1
+        ADMISSION_RUNNING_BYTES.set(self.running_bytes)
+
+    def lane_for(self, user_id: int, requested: Optional[str] = None) -> str:
+        """
+        Explicit bulk requests go to the bulk lane; otherwise a user's first
+        outstanding prediction is interactive and anything beyond
+        INFERENCE_INTERACTIVE_PER_USER queues as bulk.
+        """
+        if requested == BULK_LANE:
+            return BULK_LANE
+        outstanding = (
+            self._running_by_user.get(user_id, 0)
+            + self.lanes[INTERACTIVE_LANE].queued_for(user_id)
+        )
+        return INTERACTIVE_LANE if outstanding < settings.INFERENCE_INTERACTIVE_PER_USER else BULK_LANE
+
+    def drain_rate(self) -> float:
+        """Predictions completed per second over the recent window."""
+        now = time.monotonic()
+        while self._completions and now - self._completions[0] > DRAIN_WINDOW_SECONDS:
+            self._completions.popleft()
+        if len(self._completions) >= 2:
+            span = max(now - self._completions[0], 1.0)
+            return len(self._completions) / span
+        return self.max_concurrent / self._service_seconds
+
+    def expected_wait(self, position: int) -> float:
+        return position / max(self.drain_rate(), 1e-6)
+
+    def retry_after(self) -> int:
+        return min(max(math.ceil(self.expected_wait(self.queued + 1)), 1), MAX_RETRY_AFTER_SECONDS)
+
+    def _reject(self, status_code: int, reason: str, detail: str) -> HTTPException:
+        ADMISSION_REJECTED.labels(reason).inc()
+        retry_after = self.retry_after()
+        logger.warning(f"Rejecting prediction ({reason}): running={self.running}, queued={self.queued}, retry_after={retry_after}s")
+        return HTTPException(status_code=status_code, detail=detail, headers={"Retry-After": str(retry_after)})
+
+    def _enqueue(self, cost: int, user_id: int, lane: str) -> _Waiter:
+        waiter = _Waiter(cost, asyncio.get_running_loop().create_future(), user_id, lane)
+        self.lanes[lane].push(waiter)
+        return waiter
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        """The waiter to start next if it fits: interactive lane first, DRR within a lane."""
+        for lane in LANES:
+            waiter = self.lanes[lane].peek()
+            if waiter is not None:
+                if not self._fits(waiter.cost):
+                    # Hold the turn rather than letting smaller bulk work jump ahead
+                    return None
+                self.lanes[lane].pop(waiter)
+                return waiter
+        return None
+
+    def _remove_waiter(self, waiter: _Waiter) -> None:
+        self.lanes[waiter.lane].remove(waiter)
+
+    def _wake(self) -> None:
+        while (waiter := self._next_waiter()) is not None:
+            if waiter.future.done():
+                continue
+            self._start(waiter.cost, waiter.user_id)
+            waiter.future.set_result(True)
+
+    def _record_wait(self, user_id: int, lane: str, waited: float) -> None:
+        ADMISSION_WAIT.observe(waited)
+        ADMISSION_LANE_WAIT.labels(lane).observe(waited)
+        entry = self._user_waits.pop(user_id, None) or [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += waited
+        entry[2] = max(entry[2], waited)
+        self._user_waits[user_id] = entry
+        if len(self._user_waits) > MAX_TRACKED_USERS:
+            self._user_waits.popitem(last=False)
+
+    def _release(self, cost: int, started_at: float, user_id: int) -> None:
+        self.running -= 1
+        self.running_bytes -= cost
+        remaining = self._running_by_user.get(user_id, 1) - 1
+        if remaining:
+            self._running_by_user[user_id] = remaining
+        else:
+            self._running_by_user.pop(user_id, None)
+        ADMISSION_RUNNING_BYTES.set(self.running_bytes)
+        now = time.monotonic()
+        self._completions.append(now)
+        self._service_seconds = 0.8 * self._service_seconds + 0.2 * (now - started_at)
+        self._wake()
+
+    async def _acquire(self, cost: int, user_id: int, lane: str) -> None:
+        if not self.queued and self._fits(cost):
+            self._start(cost, user_id)
+            self._record_wait(user_id, lane, 0.0)
+            return
+        if self.queued >= self.max_queue:
+            raise self._reject(429, "queue_full", "Too many predictions queued, retry later")
+        if self.max_queued_per_user and sum(q.queued_for(user_id) for q in self.lanes.values()) >= self.max_queued_per_user:
+            raise self._reject(429, "user_queue_full", "Too many of your predictions are queued, retry later")
+        if self.expected_wait(self.queued + 1) > self.timeout:
+            raise self._reject(503, "overloaded", "Prediction service is overloaded, retry later")
+
+        waiter = self._enqueue(cost, user_id, lane)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self._remove_waiter(waiter)
+                waiter.future.cancel()
+                reason = "memory_budget" if self.running < self.max_concurrent else "timeout"
+                raise self._reject(503, reason, "Prediction service is overloaded, retry later")
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the client went away: hand the slot on
+                self._release(cost, time.monotonic(), user_id)
+            else:
+                self._remove_waiter(waiter)
+                waiter.future.cancel()
+            raise
+        self._record_wait(user_id, lane, time.monotonic() - waiter.enqueued_at)
+
+    @asynccontextmanager
+    async def admit(self, cost: int, user_id: int = 0, priority: Optional[str] = None):
+        lane = self.lane_for(user_id, priority)
+        await self._acquire(cost, user_id, lane)
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(cost, started_at, user_id)
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "queued_by_lane": {lane: queue.size for lane, queue in self.lanes.items()},
+            "queued_users": len({user_id for queue in self.lanes.values() for user_id in queue.queues}),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "running_mb": round(self.running_bytes / (1024 * 1024), 1),
+            "memory_budget_mb": round(self.memory_budget / (1024 * 1024), 1),
+            "drain_rate_per_second": round(self.drain_rate(), 3),
+            # Users who waited longest for admission in this process
+            "top_user_waits": [
+                {
+                    "user_id": user_id,
+                    "admitted": int(admitted),
+                    "mean_wait_seconds": round(total / admitted, 3),
+                    "max_wait_seconds": round(longest, 3),
+                }
+                for user_id, (admitted, total, longest) in sorted(
+                    self._user_waits.items(), key=lambda item: item[1][2], reverse=True
+                )[:TOP_USER_WAITS]
+            ],
+        }
+
+
+inference_admission = InferenceAdmission(
+    max_concurrent=settings.INFERENCE_MAX_CONCURRENT or max(2 * settings.INFERENCE_WORKERS, 2),
+    max_queue=settings.INFERENCE_ADMISSION_QUEUE_DEPTH,
+    memory_budget=settings.INFERENCE_MEMORY_BUDGET_MB * 1024 * 1024,
+    timeout=settings.INFERENCE_ADMISSION_TIMEOUT,
+    max_queued_per_user=settings.INFERENCE_MAX_QUEUED_PER_USER,
+    quantum=settings.INFERENCE_FAIR_QUANTUM_MB * 1024 * 1024,
+)
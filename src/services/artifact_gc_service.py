@@ -0,0 +1,210 @@
+# src/services/artifact_gc_service.py
+import os
+import json
+import time
+import fcntl
+import tempfile
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.db.session import SessionLocal
+from src.models.radiograph_model import Radiograph
+from src.services.storage_service import get_storage, ARTIFACT_PREFIXES
+
+logger = logging.getLogger(__name__)
+
+GC_LOCK_PATH = os.path.join(tempfile.gettempdir(), "radiograph_artifact_gc.lock")
+# Where the last run stopped, so a run that hits max_deletions is resumed by the next one
+GC_CURSOR_PATH = os.path.join(tempfile.gettempdir(), "radiograph_artifact_gc.cursor")
+
+
+def load_cursor() -> Optional[Tuple[str, str]]:
+    """(prefix, last handled key) saved by an unfinished run, or None to start from the top."""
+    try:
+        with open(GC_CURSOR_PATH) as file_object:
+            cursor = json.load(file_object)
+        return cursor["prefix"], cursor["key"]
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable artifact GC cursor: {str(e)}")
+        return None
+
+
+def save_cursor(cursor: Optional[Tuple[str, str]]) -> None:
+    if cursor is None:
+        try:
+            os.remove(GC_CURSOR_PATH)
+        except FileNotFoundError:
+            pass
+        return
+    temp_path = f"{GC_CURSOR_PATH}.tmp"
+    with open(temp_path, "w") as file_object:
+        json.dump({"prefix": cursor[0], "key": cursor[1]}, file_object)
+    os.replace(temp_path, GC_CURSOR_PATH)
+
+
+@contextmanager
+def gc_lock() -> Iterator[bool]:
+    """Hold the node-wide GC lock for the block; yields False when another process has it."""
+    with open(GC_LOCK_PATH, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _scan_candidates(min_age: float, cursor: Optional[Tuple[str, str]] = None) -> Iterator[Tuple[str, str]]:
+    """Stream (prefix, key) for stored artifacts old enough to reclaim, in key order."""
+    storage = get_storage()
+    cutoff = time.time() - min_age
+    prefixes = ARTIFACT_PREFIXES
+    start_prefix, start_after = cursor if cursor and cursor[0] in ARTIFACT_PREFIXES else (None, None)
+    if start_prefix is not None:
+        prefixes = prefixes[prefixes.index(start_prefix):]
+    for prefix in prefixes:
+        for key, modified_at in storage.list_keys(prefix, start_after=start_after if prefix == start_prefix else None):
+            # Skip files still being written by an in-flight prediction
+            if modified_at > cutoff:
+                continue
+            yield prefix, key
+
+
+def _still_referenced(db: Session, paths: List[str]) -> Set[str]:
+    # One indexed lookup per batch keeps memory flat however many rows the table holds,
+    # and sees rows added while the scan was running
+    rows = (
+        db.query(Radiograph.original, Radiograph.mask_file, Radiograph.overlay)
+        .filter(
+            or_(
+                Radiograph.original.in_(paths),
+                Radiograph.mask_file.in_(paths),
+                Radiograph.overlay.in_(paths),
+            )
+        )
+        .all()
+    )
+    return {path for row in rows for path in Radiograph.artifact_paths(row)}
+
+
+def collect_orphans(
+    db: Session,
+    dry_run: bool = False,
+    batch_size: int = None,
+    batch_pause: float = None,
+    max_deletions: int = None,
+    min_age: float = None,
+    resume: bool = True,
+) -> Dict:
+    """
+    Reclaim stored upload artifacts that no radiograph row references.
+    Files are listed page by page and checked against the table in small
+    batches with a pause in between, so the scan runs in bounded memory next
+    to live traffic; each run stops after max_deletions files
+    and saves where it stopped, and the next run continues from there.
+    Dry runs neither read nor move the cursor.
+    """
+    batch_size = batch_size or settings.ARTIFACT_GC_BATCH_SIZE
+    batch_pause = settings.ARTIFACT_GC_BATCH_PAUSE if batch_pause is None else batch_pause
+    max_deletions = max_deletions or settings.ARTIFACT_GC_MAX_DELETIONS
+    min_age = settings.ARTIFACT_GC_MIN_AGE_SECONDS if min_age is None else min_age
+    use_cursor = resume and not dry_run
+
+    storage = get_storage()
+    started = time.perf_counter()
+    cursor = load_cursor() if use_cursor else None
+    stats = {
+        "scanned": 0,
+        "orphans": 0,
+        "deleted": 0,
+        "failed": 0,
+        "dry_run": dry_run,
+        "resumed_from": cursor[1] if cursor else None,
+    }
+    position = cursor
+
+    def process(batch: List[Tuple[str, str]]) -> bool:
+        """Handle a batch; returns False as soon as the per-run limit is reached."""
+        nonlocal position
+        live = _still_referenced(db, [path for _, path in batch])
+        stats["scanned"] += len(batch)
+        for prefix, path in batch:
+            if stats["orphans"] >= max_deletions:
+                return False
+            position = (prefix, path)
+            if path in live:
+                continue
+            stats["orphans"] += 1
+            if dry_run:
+                logger.info(f"Orphaned artifact: {path}")
+                continue
+            try:
+                storage.delete(path)
+                stats["deleted"] += 1
+                logger.info(f"Reclaimed orphaned artifact: {path}")
+            except Exception as e:
+                stats["failed"] += 1
+                logger.warning(f"Failed to reclaim {path}: {str(e)}")
+        return True
+
+    finished = True
+    batch = []
+    for candidate in _scan_candidates(min_age, cursor):
+        batch.append(candidate)
+        if len(batch) >= batch_size:
+            if not process(batch):
+                finished = False
+                break
+            batch = []
+            if use_cursor:
+                # Saved per batch so a crashed run resumes close to where it died
+                save_cursor(position)
+            time.sleep(batch_pause)
+    else:
+        if batch and not process(batch):
+            finished = False
+
+    if finished:
+        stats["cursor"] = None
+    else:
+        logger.info(f"Artifact GC reached its per-run limit of {max_deletions} files, stopped at {position[1]}")
+        stats["cursor"] = position[1]
+    if use_cursor:
+        # A completed pass starts the next run from the top again
+        save_cursor(None if finished else position)
+
+    stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Artifact GC finished: {stats}")
+    return stats
+
+
+def run_collection_once() -> Dict:
+    """Run one collection pass unless another process on this node holds the GC lock."""
+    with gc_lock() as acquired:
+        if not acquired:
+            logger.info("Artifact GC already running in another process, skipping")
+            return {"skipped": True}
+        db = SessionLocal()
+        try:
+            return collect_orphans(db)
+        finally:
+            db.close()
+
+
+async def run_periodic_collection() -> None:
+    interval = settings.ARTIFACT_GC_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(run_collection_once)
+        except Exception as e:
+            logger.error(f"Artifact GC failed: {str(e)}")
@@ -0,0 +1,198 @@
+# src/services/file_cleanup_service.py
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.db.session import SessionLocal
+from src.models.file_cleanup_job_model import FileCleanupJob
+from src.services.storage_service import get_storage
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Jobs whose files this process is still removing. The file_cleanup_jobs row is the
+# source of truth for status requests, which may land on any worker; this process
+# only mirrors its own jobs' progress into it.
+_jobs: Dict[str, Dict] = {}
+_jobs_lock = threading.Lock()
+# Serializes row writes so a slower, older snapshot never overwrites a newer one
+_flush_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.FILE_CLEANUP_WORKERS,
+                thread_name_prefix="file-cleanup",
+            )
+        return _executor
+
+
+def _remove_file(file_path: str) -> bool:
+    """Remove a single stored file, retrying with backoff. Missing files count as removed."""
+    for attempt in range(1, settings.FILE_CLEANUP_MAX_RETRIES + 1):
+        try:
+            get_storage().delete(file_path)
+            logger.info(f"Deleted file: {file_path}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to delete file {file_path} (attempt {attempt}): {str(e)}")
+            if attempt < settings.FILE_CLEANUP_MAX_RETRIES:
+                time.sleep(settings.FILE_CLEANUP_RETRY_BACKOFF * 2 ** (attempt - 1))
+    return False
+
+
+def _finish_if_done(job: Dict) -> None:
+    if job["pending"] == 0 and job["queued_all"]:
+        job["status"] = "completed" if not job["failed_files"] else "completed_with_errors"
+        job["finished_at"] = datetime.utcnow()
+
+
+def _flush(job_id: str, force: bool = False) -> None:
+    """
+    Write a job's progress to its row, at most once per FILE_CLEANUP_PROGRESS_INTERVAL
+    unless forced or finished. A finished job is written once more and forgotten.
+    """
+    with _flush_lock:
+        with _jobs_lock:
+            job = _jobs.get(job_id)
+            if job is None:
+                return
+            now = time.monotonic()
+            if not force and job["finished_at"] is None and now - job["flushed_at"] < settings.FILE_CLEANUP_PROGRESS_INTERVAL:
+                return
+            job["flushed_at"] = now
+            values = {
+                "status": job["status"],
+                "queued_files": job["queued_files"],
+                "deleted_files": job["deleted_files"],
+                "failed_files": list(job["failed_files"]),
+                "queued_all": job["queued_all"],
+                "finished_at": job["finished_at"],
+                "updated_at": datetime.utcnow(),
+            }
+            if job["finished_at"] is not None:
+                del _jobs[job_id]
+        db = SessionLocal()
+        try:
+            db.query(FileCleanupJob).filter(FileCleanupJob.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            # The row then goes stale and is reported as interrupted; the orphan GC reclaims any leftovers
+            logger.error(f"Failed to record progress of file cleanup job {job_id}: {str(e)}")
+        finally:
+            db.close()
+
+
+def _run_removal(job_id: str, file_path: str) -> None:
+    removed = _remove_file(file_path)
+    with _jobs_lock:
+        job = _jobs[job_id]
+        job["pending"] -= 1
+        if removed:
+            job["deleted_files"] += 1
+        else:
+            job["failed_files"].append(file_path)
+        _finish_if_done(job)
+    _flush(job_id)
+
+
+def _prune_jobs(db: Session) -> None:
+    # Forget finished jobs beyond the retention limit, oldest first
+    expired_ids = [
+        row.id
+        for row in db.query(FileCleanupJob.id)
+        .filter(FileCleanupJob.finished_at.isnot(None))
+        .order_by(FileCleanupJob.finished_at.desc())
+        .offset(settings.FILE_CLEANUP_JOB_RETENTION)
+        .all()
+    ]
+    if expired_ids:
+        db.query(FileCleanupJob).filter(FileCleanupJob.id.in_(expired_ids)).delete(synchronize_session=False)
+
+
+def create_cleanup_job() -> str:
+    job_id = uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        _prune_jobs(db)
+        db.add(FileCleanupJob(id=job_id, status="running", queued_files=0, deleted_files=0, failed_files=[], queued_all=False, updated_at=datetime.utcnow()))
+        db.commit()
+    finally:
+        db.close()
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "status": "running",
+            "pending": 0,
+            "queued_files": 0,
+            "deleted_files": 0,
+            "failed_files": [],
+            "queued_all": False,
+            "finished_at": None,
+            "flushed_at": time.monotonic(),
+        }
+    return job_id
+
+
+def enqueue_file_removal(job_id: str, file_paths: List[str]) -> None:
+    """Hand file paths to the background deletion queue under an existing job."""
+    executor = _get_executor()
+    file_paths = [path for path in file_paths if path]
+    with _jobs_lock:
+        _jobs[job_id]["pending"] += len(file_paths)
+        _jobs[job_id]["queued_files"] += len(file_paths)
+    for file_path in file_paths:
+        executor.submit(_run_removal, job_id, file_path)
+
+
+def finish_enqueueing(job_id: str) -> None:
+    """Mark that no more files will be queued for the job."""
+    with _jobs_lock:
+        job = _jobs[job_id]
+        job["queued_all"] = True
+        _finish_if_done(job)
+    _flush(job_id, force=True)
+
+
+def get_cleanup_job(db: Session, job_id: str) -> Optional[Dict]:
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.FILE_CLEANUP_JOB_STALE_SECONDS)
+    result = (
+        db.query(FileCleanupJob, (FileCleanupJob.updated_at < cutoff).label("stale"))
+        .filter(FileCleanupJob.id == job_id)
+        .first()
+    )
+    if result is None:
+        return None
+    job, stale = result
+    status = job.status
+    if status == "running" and stale:
+        # The worker that owned the job stopped before finishing it
+        status = "interrupted"
+    failed_files = list(job.failed_files or [])
+    return {
+        "job_id": job.id,
+        "status": status,
+        "pending": max(job.queued_files - job.deleted_files - len(failed_files), 0),
+        "queued_files": job.queued_files,
+        "deleted_files": job.deleted_files,
+        "failed_files": failed_files,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def shutdown_cleanup_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
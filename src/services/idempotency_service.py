@@ -0,0 +1,145 @@
+# src/services/idempotency_service.py
+import time
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.models.idempotency_key_model import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# Requests running in this process, so a retry that lands here attaches to the
+# original instead of polling the table
+_inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+_last_purge = 0.0
+
+
+def request_fingerprint(*parts) -> str:
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def upload_digest(file_object, chunk_size: int = 1024 * 1024) -> str:
+    """sha256 of a spooled upload's content, leaving the file rewound for the request."""
+    digest = hashlib.sha256()
+    file_object.seek(0)
+    for chunk in iter(lambda: file_object.read(chunk_size), b""):
+        digest.update(chunk)
+    file_object.seek(0)
+    return digest.hexdigest()
+
+
+def _purge_expired(db: Session) -> None:
+    """Drop expired keys at most once per IDEMPOTENCY_PURGE_INTERVAL seconds."""
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge < settings.IDEMPOTENCY_PURGE_INTERVAL:
+        return
+    _last_purge = now
+    purged = db.query(IdempotencyKey).filter(IdempotencyKey.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+    db.commit()
+    if purged:
+        logger.info(f"Purged {purged} expired idempotency keys")
+
+
+async def claim_idempotency_key(db: Session, user_id: int, key: str, fingerprint: str) -> Tuple[Optional[IdempotencyKey], Optional[Dict]]:
+    """
+    Returns (record, None) when the caller owns the key and must run the request,
+    or (None, response) when an earlier request with the key already produced one.
+    A request still in flight elsewhere is waited for, up to IDEMPOTENCY_WAIT_SECONDS.
+    """
+    _purge_expired(db)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        # Expired keys (including in-progress keys abandoned by a crashed worker) start over
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at <= datetime.utcnow(),
+        ).delete(synchronize_session=False)
+        db.commit()
+        record = db.query(IdempotencyKey).filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key).first()
+
+        if record is None:
+            record = IdempotencyKey(
+                user_id=user_id,
+                key=key,
+                request_fingerprint=fingerprint,
+                status="in_progress",
+                expires_at=datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT),
+            )
+            db.add(record)
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another request claimed the key first; look again
+                db.rollback()
+                continue
+            _inflight[(user_id, key)] = asyncio.get_running_loop().create_future()
+            return record, None
+
+        if record.request_fingerprint != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if record.status == "completed":
+            logger.info(f"Replaying stored response for idempotency key {key}")
+            return None, record.response
+
+        future = _inflight.get((user_id, key))
+        if future is not None:
+            logger.info(f"Attaching to in-flight request for idempotency key {key}")
+            try:
+                return None, await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The original request was cancelled and released the key; claim it afresh
+                db.expire_all()
+                continue
+
+        # In flight in another worker process: wait for it to finish or give up
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": str(max(int(settings.IDEMPOTENCY_WAIT_SECONDS), 1))},
+            )
+        await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+        db.expire_all()
+
+
+def complete_idempotency_key(db: Session, record: IdempotencyKey, response: Dict, stored_response: Dict, radiograph_id: Optional[int] = None) -> None:
+    """Store the outcome for replays and hand the full response to attached requests."""
+    inflight_key = (record.user_id, record.key)
+    record.status = "completed"
+    record.radiograph_id = radiograph_id
+    record.response = jsonable_encoder(stored_response)
+    record.expires_at = datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+    db.commit()
+    future = _inflight.pop(inflight_key, None)
+    if future is not None and not future.done():
+        future.set_result(response)
+
+
+def release_idempotency_key(db: Session, record: IdempotencyKey, error: BaseException) -> None:
+    """Forget a key whose request failed, so the client's retry runs it again."""
+    record_id, user_id, key = record.id, record.user_id, record.key
+    try:
+        db.rollback()
+        db.query(IdempotencyKey).filter(IdempotencyKey.id == record_id).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        # The key then simply expires after IDEMPOTENCY_IN_PROGRESS_TIMEOUT
+        logger.warning(f"Failed to release idempotency key {key}: {str(e)}")
+    future = _inflight.pop((user_id, key), None)
+    if future is not None and not future.done():
+        if isinstance(error, Exception):
+            future.set_exception(error)
+            # Mark the exception as retrieved so an unattended future does not log it
+            future.exception()
+        else:
+            future.cancel()
@@ -0,0 +1,245 @@
+# src/services/inference_pool.py
+import os
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.core.config import settings
+from src.services.inference_service import InferenceBackend, INPUT_SHAPE
+from src.services.shared_memory_ring import AttachedRing, RingLayout, SharedMemoryRing
+
+logger = logging.getLogger(__name__)
+
+# Set inside each worker process by _init_worker
+_worker_backend: Optional[InferenceBackend] = None
+_worker_ring: Optional[AttachedRing] = None
+
+# One request's batch: 4 patches in, 4 class-index planes out
+RING_INPUT_SHAPE = (4, *INPUT_SHAPE)
+RING_OUTPUT_SHAPE = RING_INPUT_SHAPE[:3]
+
+
+def api_worker_slot() -> Tuple[int, int]:
+    """
+    (index, count) of this API process among the server's workers, as set by
+    src/server.py; (0, 1) when running a single uvicorn process.
+    """
+    return int(os.environ.get("SERVER_WORKER_INDEX", 0)), max(int(os.environ.get("SERVER_WORKER_COUNT", 1)), 1)
+
+
+def parse_cpu_affinity(spec: str, workers: int, api_index: int = 0, api_workers: int = 1) -> List[Optional[List[int]]]:
+    """
+    Per-worker CPU sets from INFERENCE_WORKER_CPU_AFFINITY:
+    "" disables pinning, "auto" splits the available cores evenly and
+    "0-3;4-7" lists one core set per worker.
+
+    Every API process runs its own pool, so the sets are taken over all
+    api_workers * workers pool processes and this API process gets its share:
+    with "auto" the cores are split between API processes first, and listed
+    sets are handed out in order across them.
+    """
+    if not spec:
+        return [None] * workers
+    total = api_workers * workers
+    first = api_index * workers
+    if spec == "auto":
+        cpus = sorted(os.sched_getaffinity(0))
+        per_worker = max(len(cpus) // total, 1)
+        return [cpus[i * per_worker:(i + 1) * per_worker] or cpus for i in range(first, first + workers)]
+    sets = []
+    for group in spec.split(";"):
+        cpus = []
+        for part in group.split(","):
+            start, _, end = part.strip().partition("-")
+            cpus.extend(range(int(start), int(end or start) + 1))
+        sets.append(cpus)
+    return [sets[i % len(sets)] for i in range(first, first + workers)]
+
+
+def _init_worker(slot_queue, model_path: str, ring_name: Optional[str] = None, ring_slots: int = 0) -> None:
+    """Configure threading for this worker, then load and warm its own copy of the model."""
+    global _worker_backend, _worker_ring
+    worker_index, cpus = slot_queue.get()
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    # Read by OpenMP/MKL when TensorFlow or ONNX Runtime load below
+    blas_threads = settings.INFERENCE_WORKER_BLAS_THREADS
+    for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[variable] = str(blas_threads)
+    try:
+        # numpy's BLAS is already loaded by the time the initializer runs
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(blas_threads)
+    except ImportError:
+        pass
+
+    import cv2
+
+    cv2.setNumThreads(settings.INFERENCE_WORKER_OPENCV_THREADS)
+
+    from src.services.inference_service import create_backend
+
+    _worker_backend = create_backend(settings.INFERENCE_BACKEND, model_path)
+    _worker_backend.warmup()
+    if ring_name:
+        _worker_ring = AttachedRing(ring_name, RingLayout(ring_slots, RING_INPUT_SHAPE, RING_OUTPUT_SHAPE))
+    logger.info(f"Inference worker {worker_index} (pid {os.getpid()}) ready, cpus={cpus or 'all'}")
+
+
+def _worker_predict_classes(batch: np.ndarray) -> np.ndarray:
+    # Class indices are 1 byte per pixel, so only a fraction of the scores cross the pipe
+    return _worker_backend.predict_classes(batch)
+
+
+def _worker_predict_slot(index: int, generation: int) -> bool:
+    """Run the batch in ring slot `index` and write class indices back into the slot."""
+    # The owner never recycles a slot while it is in flight, so the generation can only
+    # have moved if the slot was reclaimed before this task was submitted
+    if not _worker_ring.is_current(index, generation):
+        return False
+    classes = _worker_backend.predict_classes(_worker_ring.inputs[index])
+    _worker_ring.outputs[index][...] = classes
+    return True
+
+
+def _worker_ping() -> int:
+    time.sleep(0.2)
+    return os.getpid()
+
+
+class ProcessPoolBackend(InferenceBackend):
+    """
+    Dispatches inference to a pool of spawned worker processes, each holding one model.
+
+    The pool belongs to the API process that starts it: under src.server each
+    of the WEB_CONCURRENCY workers runs its own, so there are WEB_CONCURRENCY *
+    INFERENCE_WORKERS model copies in total. Size INFERENCE_WORKERS for that
+    product, not for the machine; core pinning is split across all of them.
+    """
+
+    name = "process_pool"
+
+    def __init__(self, model_path: str):
+        super().__init__(model_path)
+        self.workers = settings.INFERENCE_WORKERS
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._restart_lock = threading.Lock()
+        self.ring: Optional[SharedMemoryRing] = None
+        if settings.INFERENCE_SHARED_MEMORY:
+            self.ring = SharedMemoryRing(
+                settings.INFERENCE_SHM_SLOTS or 2 * self.workers,
+                RING_INPUT_SHAPE,
+                RING_OUTPUT_SHAPE,
+                lease_seconds=settings.INFERENCE_SHM_LEASE_SECONDS,
+            )
+
+    def _start_executor(self) -> None:
+        # spawn, not fork: TensorFlow and OpenCV thread pools do not survive fork
+        context = multiprocessing.get_context("spawn")
+        slot_queue = context.Queue()
+        api_index, api_workers = api_worker_slot()
+        for index, cpus in enumerate(parse_cpu_affinity(settings.INFERENCE_WORKER_CPU_AFFINITY, self.workers, api_index, api_workers)):
+            slot_queue.put((index, cpus))
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(
+                slot_queue,
+                self.model_path,
+                self.ring.name if self.ring else None,
+                self.ring.layout.slots if self.ring else 0,
+            ),
+        )
+
+    def _restart_executor(self, broken: ProcessPoolExecutor) -> None:
+        # Every request in flight on a dead pool fails at once; only the first
+        # to get here replaces it, the rest see a new executor and leave it be
+        with self._restart_lock:
+            if self.executor is not broken:
+                return
+            logger.error("Inference worker pool broke (a worker died), restarting it")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._start_executor()
+
+    def load(self) -> None:
+        api_index, api_workers = api_worker_slot()
+        model_copies = api_workers * self.workers
+        cpu_count = len(os.sched_getaffinity(0))
+        if model_copies > cpu_count:
+            logger.warning(
+                f"{api_workers} API processes x {self.workers} inference workers = {model_copies} model copies "
+                f"on {cpu_count} cores; lower INFERENCE_WORKERS or WEB_CONCURRENCY"
+            )
+        self._start_executor()
+        # Workers are spawned on demand; ping every slot so they all start now
+        pids = {future.result() for future in [self.executor.submit(_worker_ping) for _ in range(self.workers)]}
+        logger.info(f"Started {self.workers} inference workers ({settings.INFERENCE_BACKEND}), pids={sorted(pids)}")
+
+    def predict(self, batch: np.ndarray, batch_size: Optional[int] = None) -> np.ndarray:
+        return self.predict_classes(batch)
+
+    def predict_classes(self, batch: np.ndarray) -> np.ndarray:
+        return self.executor.submit(_worker_predict_classes, batch).result()
+
+    @contextmanager
+    def input_buffer(self):
+        """A shared-memory slot to preprocess into; None sends the batch through the pipe."""
+        if self.ring is None:
+            yield None
+            return
+        with self.ring.input_buffer() as buffer:
+            yield buffer
+
+    async def predict_async(self, batch: np.ndarray) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        slot = self.ring.slot_for(batch) if self.ring is not None else None
+        try:
+            if slot is None:
+                return await loop.run_in_executor(executor, _worker_predict_classes, batch)
+            return await self._predict_in_slot(executor, slot)
+        except BrokenProcessPool:
+            self._restart_executor(executor)
+            raise
+
+    async def _predict_in_slot(self, executor: ProcessPoolExecutor, slot) -> np.ndarray:
+        ring, generation = self.ring, slot.generation
+        slot.in_flight = True
+        try:
+            future = executor.submit(_worker_predict_slot, slot.index, generation)
+        except BaseException:
+            slot.in_flight = False
+            raise
+        try:
+            written = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # The worker may still be reading/writing the slot; free it once it is done
+            future.add_done_callback(lambda _: ring.release(slot, generation))
+            raise
+        except BaseException:
+            slot.in_flight = False
+            raise
+        slot.in_flight = False
+        if not written:
+            raise RuntimeError(f"Shared-memory slot {slot.index} was reclaimed before inference started")
+        # 128 KB of class indices; copied so the slot can be reused as soon as it is released
+        return slot.output.copy()
+
+    def ring_stats(self) -> Optional[Dict]:
+        return self.ring.stats() if self.ring is not None else None
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
@@ -0,0 +1,321 @@
+# src/services/inference_service.py
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+import numpy as np
+from src.core.config import settings
+from src.core.metrics import MODEL_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+# Every engine takes the 4-patch batch produced by preprocess_image_4patch
+INPUT_SHAPE = (128, 256, 3)
+
+
+class InferenceBackend:
+    """Runs the U-Net on a (N, 128, 256, 3) float batch and returns per-class scores."""
+
+    name = "base"
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+
+    def load(self) -> None:
+        raise NotImplementedError
+
+    def predict(self, batch: np.ndarray, batch_size: Optional[int] = None) -> np.ndarray:
+        """Return (N, 128, 256, num_classes) scores."""
+        raise NotImplementedError
+
+    def predict_classes(self, batch: np.ndarray) -> np.ndarray:
+        """Return (N, 128, 256) uint8 class indices."""
+        return np.argmax(self.predict(batch), axis=-1).astype(np.uint8)
+
+    async def predict_async(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Run inference without blocking the event loop. Returns either scores or
+        class indices; postprocess_prediction_4patch accepts both.
+        """
+        return await asyncio.to_thread(self.predict, batch)
+
+    def close(self) -> None:
+        pass
+
+    def warmup(self, batch_size: int = 4) -> None:
+        """Run a dummy batch so graph building and allocation happen before real traffic."""
+        self.predict(np.zeros((batch_size, *INPUT_SHAPE), dtype=np.float32))
+
+
+class KerasBackend(InferenceBackend):
+    name = "keras"
+
+    def __init__(self, model_path: str, model=None):
+        super().__init__(model_path)
+        self.model = model
+        self._predict_fn = None
+
+    def load(self) -> None:
+        import tensorflow as tf
+
+        if settings.INFERENCE_INTRA_OP_THREADS:
+            tf.config.threading.set_intra_op_parallelism_threads(settings.INFERENCE_INTRA_OP_THREADS)
+        if settings.INFERENCE_INTER_OP_THREADS:
+            tf.config.threading.set_inter_op_parallelism_threads(settings.INFERENCE_INTER_OP_THREADS)
+        if self.model is None:
+            # Load model without compilation to avoid custom objects issues
+            self.model = tf.keras.models.load_model(self.model_path, compile=False)
+        if settings.INFERENCE_TF_FUNCTION:
+            # A fixed signature with a dynamic batch dimension traces once and is
+            # reused by every request, skipping model.predict's per-call setup
+            model = self.model
+            self._predict_fn = tf.function(
+                lambda batch: model(batch, training=False),
+                input_signature=[tf.TensorSpec((None, *INPUT_SHAPE), tf.float32)],
+                jit_compile=settings.INFERENCE_XLA,
+            )
+
+    def predict(self, batch: np.ndarray, batch_size: Optional[int] = None) -> np.ndarray:
+        if self._predict_fn is not None:
+            return self._predict_fn(batch.astype(np.float32, copy=False)).numpy()
+        return self.model.predict(batch, batch_size=batch_size or len(batch), verbose=0)
+
+
+class OnnxBackend(InferenceBackend):
+    name = "onnx"
+
+    def __init__(self, model_path: str):
+        super().__init__(model_path)
+        self.session = None
+        self.input_name = None
+
+    def load(self) -> None:
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.INFERENCE_INTRA_OP_THREADS:
+            options.intra_op_num_threads = settings.INFERENCE_INTRA_OP_THREADS
+        if settings.INFERENCE_INTER_OP_THREADS:
+            options.inter_op_num_threads = settings.INFERENCE_INTER_OP_THREADS
+        self.session = ort.InferenceSession(self.model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch: np.ndarray, batch_size: Optional[int] = None) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch.astype(np.float32, copy=False)})[0]
+
+
+class TFLiteBackend(InferenceBackend):
+    name = "tflite"
+
+    def __init__(self, model_path: str):
+        super().__init__(model_path)
+        self.interpreter = None
+        self._batch_size = None
+        # One interpreter serves every request thread and it is not thread-safe:
+        # resize, set_tensor, invoke and get_tensor must run as one unit
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+        model_content = preloaded_model_content(self.model_path)
+        if model_content is not None:
+            # Built on the buffer the server master read before forking, so the
+            # weights stay in shared copy-on-write pages
+            self.interpreter = Interpreter(
+                model_content=model_content,
+                num_threads=settings.INFERENCE_INTRA_OP_THREADS or None,
+            )
+        else:
+            self.interpreter = Interpreter(
+                model_path=self.model_path,
+                num_threads=settings.INFERENCE_INTRA_OP_THREADS or None,
+            )
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+
+    def _resize(self, batch_size: int) -> None:
+        if self._batch_size == batch_size:
+            return
+        self.interpreter.resize_tensor_input(self._input["index"], (batch_size, *INPUT_SHAPE))
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = batch_size
+
+    def predict(self, batch: np.ndarray, batch_size: Optional[int] = None) -> np.ndarray:
+        with self._lock:
+            self._resize(len(batch))
+            input_detail, output_detail = self._input, self._output
+            input_dtype = input_detail["dtype"]
+            if input_dtype == np.float32:
+                data = batch.astype(np.float32, copy=False)
+            else:
+                # Fully integer-quantized model: map the float input onto the quantized range
+                scale, zero_point = input_detail["quantization"]
+                info = np.iinfo(input_dtype)
+                data = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(input_dtype)
+            self.interpreter.set_tensor(input_detail["index"], data)
+            self.interpreter.invoke()
+            # get_tensor copies, so the output is ours once the lock is released
+            output = self.interpreter.get_tensor(output_detail["index"])
+        if output.dtype != np.float32:
+            scale, zero_point = output_detail["quantization"]
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+_preloaded_models: Dict[str, bytes] = {}
+
+
+def preload_model_content(model_path: str) -> None:
+    """Read a model file into memory ahead of forking server workers."""
+    with open(model_path, "rb") as file_object:
+        _preloaded_models[model_path] = file_object.read()
+    logger.info(f"Preloaded {len(_preloaded_models[model_path])} bytes of model {model_path}")
+
+
+def preloaded_model_content(model_path: str) -> Optional[bytes]:
+    return _preloaded_models.get(model_path)
+
+
+BACKENDS = {
+    KerasBackend.name: KerasBackend,
+    OnnxBackend.name: OnnxBackend,
+    TFLiteBackend.name: TFLiteBackend,
+}
+
+
+QUANTIZED_VARIANTS = ("float16", "int8")
+
+
+def model_path_for(backend_name: str, variant: str = "float32") -> str:
+    if variant in QUANTIZED_VARIANTS:
+        if backend_name != "tflite":
+            raise RuntimeError(f"MODEL_VARIANT={variant} requires INFERENCE_BACKEND=tflite")
+        return settings.TFLITE_INT8_MODEL_PATH if variant == "int8" else settings.TFLITE_FLOAT16_MODEL_PATH
+    if variant != "float32":
+        raise RuntimeError(f"Unknown MODEL_VARIANT: {variant}")
+    if backend_name == "onnx":
+        return settings.ONNX_MODEL_PATH
+    if backend_name == "tflite":
+        return settings.TFLITE_MODEL_PATH
+    return settings.MODEL_PATH
+
+
+def create_backend(backend_name: str, model_path: Optional[str] = None) -> InferenceBackend:
+    if backend_name == "process_pool":
+        from src.services.inference_pool import ProcessPoolBackend
+
+        backend = ProcessPoolBackend(model_path or model_path_for(settings.INFERENCE_BACKEND, settings.MODEL_VARIANT))
+        backend.load()
+        return backend
+    if backend_name not in BACKENDS:
+        raise RuntimeError(f"Unknown INFERENCE_BACKEND: {backend_name}")
+    backend = BACKENDS[backend_name](model_path or model_path_for(backend_name, settings.MODEL_VARIANT))
+    backend.load()
+    logger.info(f"Loaded {backend_name} inference backend from {backend.model_path}")
+    return backend
+
+
+# TensorFlow/ONNX Runtime are only imported when the backend is first loaded,
+# so processes that never serve /predict never pay for it
+_backend: Optional[InferenceBackend] = None
+_backend_lock = threading.Lock()
+_state: Dict = {
+    "status": "not_loaded",
+    "backend": settings.INFERENCE_BACKEND,
+    "variant": settings.MODEL_VARIANT,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "error": None,
+}
+
+
+def get_inference_backend() -> InferenceBackend:
+    """Process-wide inference backend, loaded once on first use."""
+    global _backend
+    if _backend is not None:
+        return _backend
+    with _backend_lock:
+        if _backend is None:
+            _state.update(status="loading", error=None)
+            started = time.perf_counter()
+            try:
+                # With INFERENCE_WORKERS > 0 the engine lives in dedicated worker processes
+                backend_name = "process_pool" if settings.INFERENCE_WORKERS > 0 else settings.INFERENCE_BACKEND
+                backend = create_backend(backend_name)
+            except Exception as e:
+                _state.update(status="failed", error=str(e))
+                raise
+            _state.update(status="loaded", load_seconds=round(time.perf_counter() - started, 3))
+            _backend = backend
+    return _backend
+
+
+def warm_up_inference() -> None:
+    backend = get_inference_backend()
+    started = time.perf_counter()
+    try:
+        backend.warmup()
+    except Exception as e:
+        _state.update(status="failed", error=str(e))
+        raise
+    _state.update(status="ready", warmup_seconds=round(time.perf_counter() - started, 3))
+    logger.info(f"Warmed up {backend.name} inference backend in {_state['warmup_seconds']:.2f}s")
+
+
+def shutdown_inference() -> None:
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+            _backend = None
+            _state.update(status="not_loaded")
+
+
+def is_inference_ready() -> bool:
+    if settings.INFERENCE_WARMUP_ON_STARTUP:
+        return _state["status"] == "ready"
+    # Lazy mode: nothing loads until the first /predict, so the worker is ready to
+    # take traffic unless an attempted load has failed
+    return _state["status"] != "failed"
+
+
+_queue_depth = 0
+_queue_lock = threading.Lock()
+
+
+@contextmanager
+def track_inference():
+    """Count a request as queued for or running inference while inside the block."""
+    global _queue_depth
+    with _queue_lock:
+        _queue_depth += 1
+    MODEL_QUEUE_DEPTH.inc()
+    try:
+        yield
+    finally:
+        with _queue_lock:
+            _queue_depth -= 1
+        MODEL_QUEUE_DEPTH.dec()
+
+
+def inference_queue_depth() -> int:
+    return _queue_depth
+
+
+def inference_status() -> Dict:
+    status = {**_state, "ready": is_inference_ready(), "queue_depth": inference_queue_depth()}
+    ring_stats = getattr(_backend, "ring_stats", None)
+    if ring_stats is not None:
+        status["shared_memory"] = ring_stats()
+    return status
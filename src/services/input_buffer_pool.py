@@ -0,0 +1,62 @@
+# src/services/input_buffer_pool.py
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List, Tuple
+import numpy as np
+from src.core.config import settings
+from src.services.inference_service import INPUT_SHAPE
+
+logger = logging.getLogger(__name__)
+
+PATCHES_PER_IMAGE = 4
+
+
+class InputBufferPool:
+    """
+    Reusable float32 (4, 128, 256, 3) model input tensors. Preprocessing writes
+    straight into a pooled buffer, so a request allocates no float arrays of its own.
+    """
+
+    def __init__(self, size: int, shape: Tuple[int, ...] = (PATCHES_PER_IMAGE, *INPUT_SHAPE)):
+        self.size = size
+        self.shape = shape
+        self._free: List[np.ndarray] = [np.empty(shape, dtype=np.float32) for _ in range(size)]
+        self._lock = threading.Lock()
+        self.overflow_count = 0
+
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            buffer = self._free.pop() if self._free else None
+            if buffer is None:
+                self.overflow_count += 1
+        if buffer is None:
+            # More concurrent requests than pooled buffers: serve with a one-off allocation
+            logger.debug(f"Input buffer pool exhausted ({self.size} buffers), allocating")
+            buffer = np.empty(self.shape, dtype=np.float32)
+        try:
+            yield buffer
+        except asyncio.CancelledError:
+            # An inference thread may still be reading the buffer, so it is left to that
+            # thread; a fresh one takes its place so cancellations cannot drain the pool
+            self._release(np.empty(self.shape, dtype=np.float32))
+            raise
+        except BaseException:
+            self._release(buffer)
+            raise
+        else:
+            self._release(buffer)
+
+    def _release(self, buffer: np.ndarray) -> None:
+        with self._lock:
+            if len(self._free) < self.size:
+                self._free.append(buffer)
+
+    def available(self) -> int:
+        with self._lock:
+            return len(self._free)
+
+
+input_buffer_pool = InputBufferPool(settings.INFERENCE_INPUT_BUFFERS)
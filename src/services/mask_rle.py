@@ -0,0 +1,113 @@
+# src/services/mask_rle.py
+from typing import Dict, List, Tuple
+import numpy as np
+
+# COCO-style run-length encoding: alternating background/foreground run lengths,
+# starting with background, packed into COCO's compact ASCII "counts" string.
+# Unlike COCO (column-major) runs follow row-major pixel order, so every run is
+# one contiguous slice of a C-ordered image and can be painted without a mask.
+RLE_ORDER = "C"
+
+
+def _counts_to_string(counts: List[int]) -> str:
+    chars = []
+    for index, value in enumerate(counts):
+        # Store each count as a delta against the count two places back (same phase)
+        x = value - counts[index - 2] if index > 2 else value
+        more = True
+        while more:
+            c = x & 0x1F
+            x >>= 5
+            more = x != -1 if c & 0x10 else x != 0
+            if more:
+                c |= 0x20
+            chars.append(chr(c + 48))
+    return "".join(chars)
+
+
+def _string_to_counts(encoded: str) -> List[int]:
+    counts: List[int] = []
+    position = 0
+    while position < len(encoded):
+        x, shift, more = 0, 0, True
+        while more:
+            c = ord(encoded[position]) - 48
+            x |= (c & 0x1F) << (5 * shift)
+            more = bool(c & 0x20)
+            position += 1
+            shift += 1
+            if not more and c & 0x10:
+                x |= -1 << (5 * shift)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return counts
+
+
+def encode_rle(binary_mask: np.ndarray) -> Dict:
+    """Encode a 2D boolean/0-1 mask as {"size": [h, w], "counts": str, "order": "C"}."""
+    height, width = binary_mask.shape
+    flat = np.ascontiguousarray(binary_mask).reshape(-1).astype(bool, copy=False)
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    counts = np.diff(np.concatenate(([0], changes, [flat.size]))).tolist()
+    if flat.size and flat[0]:
+        counts.insert(0, 0)
+    return {"size": [int(height), int(width)], "counts": _counts_to_string(counts), "order": RLE_ORDER}
+
+
+def rle_runs(rle: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """(starts, lengths) of the foreground runs, as flat row-major pixel offsets."""
+    counts = np.asarray(_string_to_counts(rle["counts"]), dtype=np.int64)
+    ends = np.cumsum(counts)
+    lengths = counts[1::2]
+    starts = ends[0::2][: len(lengths)]
+    keep = lengths > 0
+    return starts[keep], lengths[keep]
+
+
+def rle_area(rle: Dict) -> int:
+    return int(rle_runs(rle)[1].sum())
+
+
+def run_pixel_indices(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Flat pixel offsets covered by the runs, in run order, without a Python loop per run."""
+    # Offset of each run's first pixel within the concatenated output, subtracted from its
+    # start so that adding a running 0..total-1 index walks every run contiguously
+    run_offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - run_offsets, lengths) + np.arange(int(lengths.sum()), dtype=np.int64)
+
+
+def decode_rle(rle: Dict) -> np.ndarray:
+    """Decode back to a (h, w) bool mask."""
+    height, width = rle["size"]
+    flat = np.zeros(height * width, dtype=bool)
+    flat[run_pixel_indices(*rle_runs(rle))] = True
+    return flat.reshape(height, width)
+
+
+def merge_runs(rles: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Combine several same-sized masks into one sorted run list:
+    (starts, lengths, source index into rles). Masks from one class mask
+    never overlap, so the union is just the merged runs.
+    """
+    starts, lengths, sources = [], [], []
+    for index, rle in enumerate(rles):
+        run_starts, run_lengths = rle_runs(rle)
+        starts.append(run_starts)
+        lengths.append(run_lengths)
+        sources.append(np.full(len(run_starts), index, dtype=np.int32))
+    if not starts:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.int32)
+    starts, lengths, sources = np.concatenate(starts), np.concatenate(lengths), np.concatenate(sources)
+    order = np.argsort(starts, kind="stable")
+    return starts[order], lengths[order], sources[order]
+
+
+def paint_runs(image: np.ndarray, starts: np.ndarray, lengths: np.ndarray, colors: np.ndarray) -> int:
+    """Write colors[i] over run i of a C-contiguous (h, w, channels) image; returns pixels painted."""
+    flat = image.reshape(-1, image.shape[-1])
+    # Fragmented caries masks run to thousands of runs: one fancy-indexed write for all of them
+    flat[run_pixel_indices(starts, lengths)] = np.repeat(colors, lengths, axis=0)
+    return int(lengths.sum())
@@ -0,0 +1,79 @@
+# src/services/model_parity_service.py
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+from src.services.inference_service import InferenceBackend, INPUT_SHAPE
+from src.services.radiograph_service import classes, decode_image, preprocess_image_4patch
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+CLASS_NAMES = list(classes.keys())
+BACKGROUND_INDEX = CLASS_NAMES.index("background")
+
+
+def load_calibration_batches(image_dir: Optional[str], limit: int = 50, seed: int = 0) -> List[np.ndarray]:
+    """Preprocessed 4-patch batches from real radiographs, or random batches when no directory is given."""
+    if not image_dir:
+        logger.warning("No calibration directory given, using random input batches")
+        rng = np.random.default_rng(seed)
+        return [rng.random((4, *INPUT_SHAPE), dtype=np.float32) for _ in range(limit)]
+    batches = []
+    for name in sorted(os.listdir(image_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        with open(os.path.join(image_dir, name), "rb") as file_object:
+            image = decode_image(file_object.read())
+        patches, _, _ = asyncio.run(preprocess_image_4patch(image))
+        batches.append(patches.astype(np.float32))
+        if len(batches) >= limit:
+            break
+    if not batches:
+        raise RuntimeError(f"No calibration images found in {image_dir}")
+    return batches
+
+
+def compare_backends(reference: InferenceBackend, candidate: InferenceBackend, batches: List[np.ndarray]) -> Dict:
+    """
+    Compare class-index output of two backends: pixel agreement, per-class IoU
+    and agreement of the per-radiograph detection flags.
+    """
+    num_classes = len(CLASS_NAMES)
+    intersection = np.zeros(num_classes, dtype=np.int64)
+    union = np.zeros(num_classes, dtype=np.int64)
+    agreeing_pixels = 0
+    total_pixels = 0
+    flag_matches = np.zeros(num_classes, dtype=np.int64)
+
+    for batch in batches:
+        expected = reference.predict_classes(batch)
+        actual = candidate.predict_classes(batch)
+        agreeing_pixels += int(np.count_nonzero(expected == actual))
+        total_pixels += expected.size
+        for class_id in range(num_classes):
+            expected_mask = expected == class_id
+            actual_mask = actual == class_id
+            intersection[class_id] += int(np.count_nonzero(expected_mask & actual_mask))
+            union[class_id] += int(np.count_nonzero(expected_mask | actual_mask))
+            flag_matches[class_id] += int(expected_mask.any() == actual_mask.any())
+
+    per_class_iou = {
+        name: (round(float(intersection[i] / union[i]), 6) if union[i] else None)
+        for i, name in enumerate(CLASS_NAMES)
+    }
+    detection_agreement = {
+        name: round(float(flag_matches[i] / len(batches)), 6)
+        for i, name in enumerate(CLASS_NAMES)
+        if i != BACKGROUND_INDEX
+    }
+    return {
+        "reference": reference.name,
+        "candidate": candidate.name,
+        "samples": len(batches),
+        "pixel_agreement": round(agreeing_pixels / total_pixels, 6) if total_pixels else None,
+        "per_class_iou": per_class_iou,
+        "detection_flag_agreement": detection_agreement,
+        "all_detection_flags_match": all(value == 1.0 for value in detection_agreement.values()),
+    }
@@ -1,17 +1,27 @@
-import tensorflow as tf
 import numpy as np
 import cv2
 import os
 import base64
+import asyncio
 from pathlib import Path
 from typing import Tuple, Dict, List, Optional
 from fastapi import UploadFile, HTTPException
 from PIL import Image
 import logging
+from contextlib import contextmanager
 from io import BytesIO
+from src.services.storage_service import get_storage, artifact_key, MASK_PREFIX, OVERLAY_PREFIX
+from src.services.mask_rle import encode_rle, merge_runs, paint_runs
+from src.core.metrics import observe_stage
+from src.services.inference_service import get_inference_backend
+from src.services.input_buffer_pool import input_buffer_pool
+from src.core.config import settings
 
 logging.basicConfig(level=logging.INFO)
 
+if settings.OPENCV_THREADS:
+    cv2.setNumThreads(settings.OPENCV_THREADS)
+
 classes = {
     "Impaksi": [184, 61, 245],
     "Karies": [221, 255, 51],
@@ -29,11 +39,29 @@ CONDITIONS = {
 
 MASK_COLOR_MAPPINGS = {}
 
-async def load_model(model_path: str):
+def build_gamma_table(gamma: float) -> np.ndarray:
+    inv_gamma = 1.0 / gamma
+    return np.array([(i / 255.0) ** inv_gamma * 255 for i in np.arange(256)]).astype("uint8")
+
+def build_class_palette(class_colors: Dict) -> np.ndarray:
+    """256-entry class index -> RGB table; indices without a class map to black."""
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    for class_id, color in enumerate(class_colors.values()):
+        palette[class_id] = color
+    return palette
+
+# Read-only lookup tables, built once at import (and shared across forked server workers)
+DEFAULT_GAMMA = 1.5
+GAMMA_TABLE = build_gamma_table(DEFAULT_GAMMA)
+CLASS_PALETTE = build_class_palette(classes)
+# Gamma correction and the /255 normalization folded into one uint8 -> float32 lookup
+FLOAT_GAMMA_TABLE = (GAMMA_TABLE.astype(np.float32) / np.float32(255.0))
+
+async def load_model():
     try:
-        # Load model without compilation to avoid custom objects issues
-        model = tf.keras.models.load_model(model_path, compile=False)
-        return model
+        # Loaded once per process by the configured inference backend (keras/onnx/tflite);
+        # a first load runs off the event loop so other routes keep serving meanwhile
+        return await asyncio.to_thread(get_inference_backend)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load model: {str(e)}")
 
@@ -50,30 +78,83 @@ def apply_clahe(img):
         logging.warning(f"CLAHE application failed, using original image: {str(e)}")
         return img
 
-def apply_gamma(img, gamma=1.5):
+def apply_gamma(img, gamma=DEFAULT_GAMMA):
     """Apply gamma correction"""
     try:
-        inv_gamma = 1.0 / gamma
-        table = np.array([(i / 255.0) ** inv_gamma * 255 for i in np.arange(256)]).astype("uint8")
+        table = GAMMA_TABLE if gamma == DEFAULT_GAMMA else build_gamma_table(gamma)
         return cv2.LUT(img, table)
     except Exception as e:
         logging.warning(f"Gamma correction failed, using original image: {str(e)}")
         return img
 
-async def preprocess_image_4patch(image_path: str, target_size: Tuple[int, int] = (512, 256)):
+def decode_image(data: bytes, flags: int = cv2.IMREAD_COLOR) -> np.ndarray:
+    """Decode encoded image bytes into an RGB array"""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+    if image is None:
+        raise HTTPException(status_code=400, detail="Failed to read image")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+# EXIF orientations that rotate the image by 90 degrees when decoded
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+_REDUCED_DECODE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+
+def image_dimensions(data) -> Tuple[int, int]:
+    """(width, height) as decoded, read from the header of image bytes or a file object without decoding pixels"""
+    try:
+        with Image.open(BytesIO(data) if isinstance(data, (bytes, bytearray)) else data) as header:
+            width, height = header.size
+            if header.getexif().get(0x0112) in _TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+            return width, height
+    except Exception:
+        raise HTTPException(status_code=400, detail="Failed to read image")
+
+def decode_reduction_factor(width: int, height: int, target_size: Tuple[int, int]) -> int:
+    """Largest power-of-two downscale whose output still covers target_size"""
+    for factor in sorted(_REDUCED_DECODE_FLAGS, reverse=True):
+        if -(-width // factor) >= target_size[0] and -(-height // factor) >= target_size[1]:
+            return factor
+    return 1
+
+def decode_for_inference(data: bytes, image_size: Tuple[int, int], target_size: Tuple[int, int] = (512, 256)) -> np.ndarray:
+    """
+    Decode only as much resolution as the model needs. JPEG decoders scale
+    during the DCT, so a 1/4 or 1/8 decode skips most of the work and memory.
+    """
+    factor = decode_reduction_factor(image_size[0], image_size[1], target_size) if settings.INFERENCE_REDUCED_DECODE else 1
+    if factor == 1:
+        return decode_image(data)
+    logging.info(f"Decoding inference input at 1/{factor} scale")
+    return decode_image(data, _REDUCED_DECODE_FLAGS[factor])
+
+@contextmanager
+def model_input_buffer(model):
+    """
+    Float32 tensor to preprocess into: a shared-memory slot when the backend
+    offers one (process pool), otherwise a buffer from the local pool.
+    """
+    acquire = getattr(model, "input_buffer", None)
+    if acquire is not None:
+        with acquire() as buffer:
+            if buffer is not None:
+                yield buffer
+                return
+    with input_buffer_pool.acquire() as buffer:
+        yield buffer
+
+async def preprocess_image_4patch(image: np.ndarray, target_size: Tuple[int, int] = (512, 256), out: Optional[np.ndarray] = None):
     """
     Preprocess image for 4-patch model:
     - Resize to 512x256
     - Split into 4 patches of 256x128 each
     - Apply CLAHE and gamma correction
+    Patches are written as float32 into `out` (shape (4, 128, 256, 3)) when given.
     """
     try:
-        image = cv2.imread(image_path)
-        if image is None:
-            raise HTTPException(status_code=400, detail="Failed to read image")
-        
-        # Convert BGR to RGB
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         original_size = image.shape[:2]
         
         # Resize to target size (512x256)
@@ -81,26 +162,29 @@ async def preprocess_image_4patch(image_path: str, target_size: Tuple[int, int]
         
         # Define patch dimensions
         patch_h, patch_w = 128, 256
-        patches = []
+        if out is None:
+            out = np.empty((4, patch_h, patch_w, 3), dtype=np.float32)
         
         # Split into 4 patches (2x2 grid)
+        idx = 0
         for i in range(2):  # Vertical
             for j in range(2):  # Horizontal
                 y0, y1 = i * patch_h, (i + 1) * patch_h
                 x0, x1 = j * patch_w, (j + 1) * patch_w
                 patch = resized_image[y0:y1, x0:x1]
                 
-                # Apply preprocessing to each patch
+                # Apply preprocessing to each patch; gamma and normalization are
+                # a single table lookup that lands directly in the input tensor
                 patch = apply_clahe(patch)
-                patch = apply_gamma(patch)
-                patch = patch / 255.0  # Normalize
-                patches.append(patch)
+                np.take(FLOAT_GAMMA_TABLE, patch, out=out[idx], mode="clip")
+                idx += 1
         
-        patches_array = np.array(patches)
-        logging.info(f"Created {len(patches)} patches with shape: {patches_array.shape}")
+        logging.info(f"Created {idx} patches with shape: {out.shape}")
         
-        return patches_array, original_size, resized_image
+        return out, original_size, resized_image
         
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image preprocessing failed: {str(e)}")
 
@@ -150,57 +234,103 @@ async def postprocess_prediction_4patch(predictions, target_size: Tuple[int, int
 async def convert_class_to_rgb(mask_class: np.ndarray, class_colors: Dict, mask_file_path: str):
     try:
         height, width = mask_class.shape
-        mask_rgb = np.zeros((height, width, 3), dtype="uint8")
-        class_list = list(class_colors.values())
-        for class_id, color in enumerate(class_list):
-            mask_rgb[mask_class == class_id] = color
+        palette = CLASS_PALETTE if class_colors is classes else build_class_palette(class_colors)
+        mask_rgb = palette[mask_class.astype(np.uint8, copy=False)]
         unique_colors = np.unique(mask_rgb.reshape(-1, mask_rgb.shape[2]), axis=0)
         logging.info(f"Unique colors in converted mask before saving: {unique_colors}")
         return mask_rgb
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RGB conversion failed: {str(e)}")
 
-async def create_overlay_image(original_image: np.ndarray, predicted_mask_rgb: np.ndarray, image_path: str) -> Tuple[str, str]:
+async def create_overlay_image(original_image: np.ndarray, predicted_mask_rgb: np.ndarray, image_key: str) -> Tuple[str, str]:
     try:
-        predicted_mask_rgb = cv2.resize(predicted_mask_rgb, (original_image.shape[1], original_image.shape[0]))
-        alpha = 0.5
-        overlay = original_image.copy()
-        cv2.addWeighted(predicted_mask_rgb, alpha, overlay, 1 - alpha, 0, overlay)
+        with observe_stage("predict", "overlay_blend"):
+            predicted_mask_rgb = cv2.resize(predicted_mask_rgb, (original_image.shape[1], original_image.shape[0]))
+            alpha = 0.5
+            overlay = original_image.copy()
+            cv2.addWeighted(predicted_mask_rgb, alpha, overlay, 1 - alpha, 0, overlay)
 
-        _, buffer = cv2.imencode(".jpg", cv2.cvtColor(overlay, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
-        encoded_image = base64.b64encode(buffer).decode("utf-8")
+        with observe_stage("predict", "overlay_encode"):
+            _, buffer = cv2.imencode(".jpg", cv2.cvtColor(overlay, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
+            encoded_image = base64.b64encode(buffer).decode("utf-8")
 
         if len(encoded_image) < 100:
             raise HTTPException(status_code=500, detail="Generated base64 image string is too short or invalid")
 
-        base_filename = os.path.basename(image_path)
+        base_filename = os.path.basename(image_key)
         overlay_filename = f"overlay_{base_filename}"
-        overlay_path = os.path.join("uploads", "overlay", overlay_filename)
-        os.makedirs(os.path.dirname(overlay_path), exist_ok=True)
-        cv2.imwrite(overlay_path, cv2.cvtColor(overlay, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
+        overlay_path = artifact_key(OVERLAY_PREFIX, overlay_filename)
+        # Reuse the JPEG buffer that was just encoded for the response
+        with observe_stage("predict", "overlay_save"):
+            get_storage().put_bytes(overlay_path, buffer.tobytes(), content_type="image/jpeg")
 
         logging.info(f"Overlay image created at {overlay_path}, base64 length: {len(encoded_image)}")
         return encoded_image, overlay_path
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create overlay: {str(e)}")
 
-async def predict_image(model, image_path: str):
+def condition_flag(condition_name: str) -> str:
+    """Radiograph column holding the detection flag for a condition, e.g. has_karies"""
+    return f"has_{condition_name.lower().replace(' ', '_')}"
+
+def summarize_findings(class_mask: np.ndarray) -> List[Dict]:
+    """
+    Per-condition region statistics for a full-resolution class-index mask:
+    pixel area, connected components (8-connectivity) with their bounding
+    boxes and centroids, largest region first, plus the condition's RLE mask.
+    Conditions with no pixels are omitted.
+    """
+    class_names = list(classes)
+    pixel_counts = np.bincount(class_mask.ravel(), minlength=len(class_names))
+    total_pixels = class_mask.size
+    findings = []
+    for class_id, condition_name in enumerate(class_names):
+        if condition_name not in CONDITIONS or pixel_counts[class_id] == 0:
+            continue
+        binary = (class_mask == class_id).view(np.uint8)
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        mask_rle = encode_rle(binary)
+        # Label 0 is the background of the binary mask
+        order = np.argsort(-stats[1:, cv2.CC_STAT_AREA]) + 1
+        findings.append({
+            "condition": condition_name,
+            "pixel_area": int(pixel_counts[class_id]),
+            "area_ratio": round(float(pixel_counts[class_id]) / total_pixels, 6),
+            "component_count": int(count - 1),
+            "bounding_boxes": stats[order, :4].astype(int).tolist(),
+            "centroids": np.round(centroids[order], 1).tolist(),
+            "mask_rle": mask_rle,
+        })
+    return findings
+
+async def predict_image(model, image_key: str):
     """
     Updated prediction function for 4-patch model with improved mask handling
     """
     try:
-        os.makedirs("uploads/masks", exist_ok=True)
-        
-        # Store original image dimensions for later use
-        original_image = cv2.imread(image_path)
-        original_image_rgb = cv2.cvtColor(original_image, cv2.COLOR_BGR2RGB)
-        original_height, original_width = original_image_rgb.shape[:2]
-        
-        # Preprocess image into 4 patches
-        patches_array, original_size, processed_image = await preprocess_image_4patch(image_path)
+        storage = get_storage()
+
+        image_data = storage.get_bytes(image_key)
+        original_width, original_height = image_dimensions(image_data)
+
+        # The model only sees 512x256, so decode at reduced scale for inference;
+        # the full-resolution decode is deferred until the overlay needs it
+        with observe_stage("predict", "decode"):
+            inference_image_rgb = decode_for_inference(image_data, (original_width, original_height))
         
-        # Predict on all patches at once
-        predictions = model.predict(patches_array, batch_size=4)
+        with model_input_buffer(model) as input_buffer:
+            # Preprocess image into 4 patches, written into a pooled float32 input tensor
+            with observe_stage("predict", "preprocess"):
+                patches_array, original_size, processed_image = await preprocess_image_4patch(inference_image_rgb, out=input_buffer)
+            del inference_image_rgb
+            
+            # Predict on all patches at once
+            with observe_stage("predict", "inference"):
+                if hasattr(model, "predict_async"):
+                    predictions = await model.predict_async(patches_array)
+                else:
+                    predictions = model.predict(patches_array, batch_size=4)
+            del patches_array
         logging.info(f"Model prediction shape: {predictions.shape if hasattr(predictions, 'shape') else type(predictions)}")
         
         # If predictions is a single array, split it back into patches
@@ -211,35 +341,37 @@ async def predict_image(model, image_path: str):
             patch_predictions = predictions
         
         # Postprocess predictions to combine patches
-        predicted_mask = await postprocess_prediction_4patch(patch_predictions)
+        with observe_stage("predict", "postprocess"):
+            predicted_mask = await postprocess_prediction_4patch(patch_predictions)
         
         # Generate file paths
-        base_filename = os.path.basename(image_path)
+        base_filename = os.path.basename(image_key)
         mask_filename = f"mask_{base_filename.rsplit('.', 1)[0]}.png"
-        mask_file_path = os.path.join("uploads", "masks", mask_filename)
+        mask_file_path = artifact_key(MASK_PREFIX, mask_filename)
         
         # Convert class indices to RGB
-        predicted_mask_rgb = await convert_class_to_rgb(predicted_mask, classes, mask_file_path)
-        
-        # **IMPORTANT: Resize mask to match original image dimensions before saving**
-        # This ensures the saved mask can be properly used in filtering
-        if predicted_mask_rgb.shape[:2] != (original_height, original_width):
-            logging.info(f"Resizing mask from {predicted_mask_rgb.shape[:2]} to ({original_height}, {original_width})")
-            predicted_mask_rgb = cv2.resize(predicted_mask_rgb, (original_width, original_height), 
-                                          interpolation=cv2.INTER_NEAREST)
+        with observe_stage("predict", "colorize_mask"):
+            # **IMPORTANT: Resize mask to match original image dimensions before saving**
+            # This ensures the saved mask can be properly used in filtering. Nearest-neighbour
+            # on class indices gives the same pixels as on colors, at a third of the work.
+            if predicted_mask.shape[:2] != (original_height, original_width):
+                logging.info(f"Resizing mask from {predicted_mask.shape[:2]} to ({original_height}, {original_width})")
+                predicted_mask = cv2.resize(predicted_mask, (original_width, original_height), 
+                                            interpolation=cv2.INTER_NEAREST)
+            predicted_mask_rgb = await convert_class_to_rgb(predicted_mask, classes, mask_file_path)
         
         # Save mask using PIL to preserve exact colors
-        mask_pil = Image.fromarray(predicted_mask_rgb)
-        mask_pil.save(mask_file_path, format="PNG", compress_level=0)
-        
-        # Verify saved mask colors
-        saved_mask = cv2.imread(mask_file_path, cv2.IMREAD_COLOR)
-        saved_mask = cv2.cvtColor(saved_mask, cv2.COLOR_BGR2RGB)
-        unique_colors_saved = np.unique(saved_mask.reshape(-1, saved_mask.shape[2]), axis=0)
-        logging.info(f"Unique colors in saved mask: {unique_colors_saved}")
-        logging.info(f"Saved mask dimensions: {saved_mask.shape[:2]}")
-
-        # Detect conditions
+        with observe_stage("predict", "mask_save"):
+            # Palette PNG: one byte per pixel, and the mostly-background plane deflates
+            # to a few KB even at the fastest level (colors are unchanged for readers)
+            mask_pil = Image.fromarray(predicted_mask)
+            mask_pil.putpalette(CLASS_PALETTE.tobytes())
+            mask_buffer = BytesIO()
+            mask_pil.save(mask_buffer, format="PNG", compress_level=1)
+            storage.put_bytes(mask_file_path, mask_buffer.getvalue(), content_type="image/png")
+        logging.info(f"Saved mask dimensions: {predicted_mask_rgb.shape[:2]}")
+
+        # Detect conditions and summarize each one's regions from the class mask
         detected_conditions = {
             "has_impaksi": False,
             "has_karies": False,
@@ -247,166 +379,131 @@ async def predict_image(model, image_path: str):
             "has_resorpsi": False,
         }
 
-        for condition_name, rgb_color in classes.items():
-            if condition_name != "background":
-                condition_key = f"has_{condition_name.lower().replace(' ', '_')}"
-                condition_mask = np.all(predicted_mask_rgb == rgb_color, axis=-1)
-                if np.any(condition_mask):
-                    detected_conditions[condition_key] = True
-                    logging.info(f"Detected {condition_name} with {np.sum(condition_mask)} pixels")
+        with observe_stage("predict", "detect_conditions"):
+            findings = summarize_findings(predicted_mask)
+            for finding in findings:
+                detected_conditions[condition_flag(finding["condition"])] = True
+                logging.info(f"Detected {finding['condition']} with {finding['pixel_area']} pixels in {finding['component_count']} regions")
 
         # Create overlay with original image (mask is already the right size)
-        encoded_overlay, overlay_path = await create_overlay_image(original_image_rgb, predicted_mask_rgb, image_path)
-        return encoded_overlay, mask_file_path, detected_conditions, overlay_path
+        with observe_stage("predict", "decode_full"):
+            original_image_rgb = decode_image(image_data)
+        encoded_overlay, overlay_path = await create_overlay_image(original_image_rgb, predicted_mask_rgb, image_key)
+        return encoded_overlay, mask_file_path, detected_conditions, overlay_path, findings
         
     except Exception as e:
         logging.error(f"Prediction error details: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
     
-async def apply_filters(original_image_path: str, mask_path: str, selected_conditions: List[str]):
+def load_filter_mask(storage, mask_key: str) -> np.ndarray:
+    """The stored RGB mask PNG, for rows whose findings cannot be painted from RLE"""
+    if not storage.exists(mask_key):
+        raise HTTPException(status_code=404, detail=f"Mask file not found at {mask_key}")
+    mask_image = cv2.imdecode(np.frombuffer(storage.get_bytes(mask_key), dtype=np.uint8), cv2.IMREAD_COLOR)
+    if mask_image is None:
+        raise HTTPException(status_code=400, detail=f"Failed to load mask at {mask_key}")
+    mask_image = cv2.cvtColor(mask_image, cv2.COLOR_BGR2RGB)
+
+    unique_colors = np.unique(mask_image.reshape(-1, mask_image.shape[2]), axis=0)
+    logging.info(f"Unique colors in mask image: {unique_colors}")
+    return mask_image
+
+async def apply_filters(original_image_key: str, mask_key: str, selected_conditions: List[str], rle_masks: Optional[Dict[str, Dict]] = None):
+    """
+    Blend the selected conditions' regions over the original image. With
+    rle_masks (condition -> RLE from the radiograph's findings) the subset is
+    painted run by run and the stored mask is never read.
+    """
     try:
-        abs_mask_path = os.path.abspath(mask_path)
-        if not os.path.exists(abs_mask_path):
-            raise HTTPException(status_code=404, detail=f"Mask file not found at {abs_mask_path}")
-        mask_image = cv2.imread(abs_mask_path, cv2.IMREAD_COLOR)
-        if mask_image is None:
-            raise HTTPException(status_code=400, detail=f"Failed to load mask at {abs_mask_path}")
-        mask_image = cv2.cvtColor(mask_image, cv2.COLOR_BGR2RGB)
-
-        unique_colors = np.unique(mask_image.reshape(-1, mask_image.shape[2]), axis=0)
-        logging.info(f"Unique colors in mask image: {unique_colors}")
-
-        abs_original_path = os.path.abspath(original_image_path)
-        if not os.path.exists(abs_original_path):
-            raise HTTPException(status_code=404, detail=f"Original image not found at {abs_original_path}")
-        original_image = cv2.imread(abs_original_path, cv2.IMREAD_COLOR)
-        if original_image is None:
-            raise HTTPException(status_code=400, detail=f"Failed to load original image at {abs_original_path}")
-        original_image = cv2.cvtColor(original_image, cv2.COLOR_BGR2RGB)
+        storage = get_storage()
+        mask_image = None
+        use_rle = rle_masks is not None
+        if not use_rle:
+            with observe_stage("filter", "mask_load"):
+                mask_image = load_filter_mask(storage, mask_key)
+
+        if not storage.exists(original_image_key):
+            raise HTTPException(status_code=404, detail=f"Original image not found at {original_image_key}")
+        with observe_stage("filter", "decode"):
+            original_image = cv2.imdecode(np.frombuffer(storage.get_bytes(original_image_key), dtype=np.uint8), cv2.IMREAD_COLOR)
+            if original_image is None:
+                raise HTTPException(status_code=400, detail=f"Failed to load original image at {original_image_key}")
+            original_image = cv2.cvtColor(original_image, cv2.COLOR_BGR2RGB)
+
+        if use_rle and any(rle["size"] != list(original_image.shape[:2]) for rle in rle_masks.values()):
+            logging.warning(f"Stored RLE size does not match {original_image_key}, using the mask file")
+            use_rle = False
+            with observe_stage("filter", "mask_load"):
+                mask_image = load_filter_mask(storage, mask_key)
 
         # Resize mask to match original image dimensions
-        mask_image = cv2.resize(mask_image, (original_image.shape[1], original_image.shape[0]))
+        with observe_stage("filter", "mask_resize"):
+            if mask_image is not None:
+                mask_image = cv2.resize(mask_image, (original_image.shape[1], original_image.shape[0]))
 
         valid_conditions = [cond for cond in selected_conditions if cond in CONDITIONS]
         logging.info(f"Selected conditions: {selected_conditions}")
         logging.info(f"Valid conditions: {valid_conditions}")
 
-        blended_filtered = original_image.copy().astype(np.uint8)
-        filtered_mask = np.zeros_like(original_image, dtype=np.uint8)
-
-        if valid_conditions:
-            for condition in valid_conditions:
-                expected_color = np.array(CONDITIONS[condition], dtype=np.uint8)
-                logging.info(f"Processing condition {condition} with expected color {expected_color}")
+        if valid_conditions and use_rle and not any(condition in rle_masks for condition in valid_conditions):
+            # None of the selected conditions was detected: nothing to paint or blend
+            return (
+                base64.b64encode(cv2.imencode(".jpg", cv2.cvtColor(original_image, cv2.COLOR_RGB2BGR))[1]).decode("utf-8"),
+                "No valid pixels found for selected conditions. The mask may not contain the expected colors."
+            )
+
+        with observe_stage("filter", "compose"):
+            blended_filtered = original_image.copy().astype(np.uint8)
+
+            if valid_conditions and use_rle:
+                # Conditions without findings have no pixels; the rest are painted run by run
+                selected = [condition for condition in valid_conditions if condition in rle_masks]
+                starts, lengths, sources = merge_runs([rle_masks[condition] for condition in selected])
+                colors = np.array([CONDITIONS[condition] for condition in selected], dtype=np.uint8).reshape(-1, 3)
+                filtered_mask = np.zeros_like(original_image, dtype=np.uint8)
+                painted = paint_runs(filtered_mask, starts, lengths, colors[sources])
+                logging.info(f"Painted {painted} pixels from {len(starts)} runs for {selected}")
+            elif valid_conditions:
+                filtered_mask = np.zeros_like(original_image, dtype=np.uint8)
+                for condition in valid_conditions:
+                    expected_color = np.array(CONDITIONS[condition], dtype=np.uint8)
+                    logging.info(f"Processing condition {condition} with expected color {expected_color}")
                 
-                # Try exact match first
-                condition_mask = np.all(mask_image == expected_color, axis=-1)
-                pixel_count = np.sum(condition_mask)
-                logging.info(f"Exact match: Found {pixel_count} pixels for {condition} with color {expected_color}")
-                
-                # Fallback to color tolerance if no exact match
-                if pixel_count == 0:
-                    color_diffs = np.abs(mask_image - expected_color).sum(axis=-1)
-                    condition_mask = color_diffs <= 15  # Tolerance of ±5 per channel
+                    # Try exact match first
+                    condition_mask = np.all(mask_image == expected_color, axis=-1)
                     pixel_count = np.sum(condition_mask)
-                    logging.info(f"Tolerance match: Found {pixel_count} pixels for {condition} within tolerance")
-                
-                if pixel_count > 0:
-                    filtered_mask[condition_mask] = expected_color
-                else:
-                    logging.warning(f"No pixels found for {condition} with color {expected_color} or within tolerance")
-
-            logging.info(f"Filtered mask pixel sum: {np.sum(filtered_mask)}")
-            if np.sum(filtered_mask) > 0:
-                alpha = 0.5
-                filtered_mask_float = filtered_mask.astype(np.float32) / 255.0
-                blended_filtered_float = blended_filtered.astype(np.float32) / 255.0
-                cv2.addWeighted(filtered_mask_float, alpha, blended_filtered_float, 1 - alpha, 0, blended_filtered_float)
-                blended_filtered = (blended_filtered_float * 255).astype(np.uint8)
-            else:
-                logging.warning("Filtered mask is empty, returning original image with message")
-                return (
-                    base64.b64encode(cv2.imencode(".jpg", cv2.cvtColor(original_image, cv2.COLOR_RGB2BGR))[1]).decode("utf-8"),
-                    "No valid pixels found for selected conditions. The mask may not contain the expected colors."
-                )
-
-        _, buffer = cv2.imencode(".jpg", cv2.cvtColor(blended_filtered, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
-        encoded_image = base64.b64encode(buffer).decode("utf-8")
-
-        if len(encoded_image) < 100:
-            raise HTTPException(status_code=500, detail="Generated filtered base64 image string is too short or invalid")
-
-        logging.info(f"Encoded filtered overlay length: {len(encoded_image)}")
-        return encoded_image, None
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Filter application failed: {str(e)}")
-    try:
-        abs_mask_path = os.path.abspath(mask_path)
-        if not os.path.exists(abs_mask_path):
-            raise HTTPException(status_code=404, detail=f"Mask file not found at {abs_mask_path}")
-        mask_image = cv2.imread(abs_mask_path, cv2.IMREAD_COLOR)
-        if mask_image is None:
-            raise HTTPException(status_code=400, detail=f"Failed to load mask at {abs_mask_path}")
-        mask_image = cv2.cvtColor(mask_image, cv2.COLOR_BGR2RGB)
-
-        unique_colors = np.unique(mask_image.reshape(-1, mask_image.shape[2]), axis=0)
-        logging.info(f"Unique colors in mask image: {unique_colors}")
-
-        abs_original_path = os.path.abspath(original_image_path)
-        if not os.path.exists(abs_original_path):
-            raise HTTPException(status_code=404, detail=f"Original image not found at {abs_original_path}")
-        original_image = cv2.imread(abs_original_path, cv2.IMREAD_COLOR)
-        if original_image is None:
-            raise HTTPException(status_code=400, detail=f"Failed to load original image at {abs_original_path}")
-        original_image = cv2.cvtColor(original_image, cv2.COLOR_BGR2RGB)
-
-        valid_conditions = [cond for cond in selected_conditions if cond in CONDITIONS]
-        logging.info(f"Selected conditions: {selected_conditions}")
-        logging.info(f"Valid conditions: {valid_conditions}")
-
-        blended_filtered = original_image.copy().astype(np.uint8)
-        filtered_mask = np.zeros_like(mask_image, dtype=np.uint8)
-
-        if valid_conditions:
-            for condition in valid_conditions:
-                expected_color = np.array(CONDITIONS[condition], dtype=np.uint8)
-                logging.info(f"Processing condition {condition} with expected color {expected_color}")
-                
-                # Try exact match first
-                condition_mask = np.all(mask_image == expected_color, axis=-1)
-                pixel_count = np.sum(condition_mask)
-                logging.info(f"Exact match: Found {pixel_count} pixels for {condition} with color {expected_color}")
+                    logging.info(f"Exact match: Found {pixel_count} pixels for {condition} with color {expected_color}")
                 
-                # Fallback to color tolerance if no exact match
-                if pixel_count == 0:
-                    color_diffs = np.abs(mask_image - expected_color).sum(axis=-1)
-                    condition_mask = color_diffs <= 15  # Tolerance of ±5 per channel
-                    pixel_count = np.sum(condition_mask)
-                    logging.info(f"Tolerance match: Found {pixel_count} pixels for {condition} within tolerance")
+                    # Fallback to color tolerance if no exact match
+                    if pixel_count == 0:
+                        color_diffs = np.abs(mask_image - expected_color).sum(axis=-1)
+                        condition_mask = color_diffs <= 15  # Tolerance of ±5 per channel
+                        pixel_count = np.sum(condition_mask)
+                        logging.info(f"Tolerance match: Found {pixel_count} pixels for {condition} within tolerance")
                 
-                if pixel_count > 0:
-                    filtered_mask[condition_mask] = expected_color
+                    if pixel_count > 0:
+                        filtered_mask[condition_mask] = expected_color
+                    else:
+                        logging.warning(f"No pixels found for {condition} with color {expected_color} or within tolerance")
+
+            if valid_conditions:
+                logging.info(f"Filtered mask pixel sum: {np.sum(filtered_mask)}")
+                if np.sum(filtered_mask) > 0:
+                    alpha = 0.5
+                    filtered_mask_float = filtered_mask.astype(np.float32) / 255.0
+                    blended_filtered_float = blended_filtered.astype(np.float32) / 255.0
+                    cv2.addWeighted(filtered_mask_float, alpha, blended_filtered_float, 1 - alpha, 0, blended_filtered_float)
+                    blended_filtered = (blended_filtered_float * 255).astype(np.uint8)
                 else:
-                    logging.warning(f"No pixels found for {condition} with color {expected_color} or within tolerance")
-
-            logging.info(f"Filtered mask pixel sum: {np.sum(filtered_mask)}")
-            if np.sum(filtered_mask) > 0:
-                alpha = 0.5
-                filtered_mask_float = filtered_mask.astype(np.float32) / 255.0
-                blended_filtered_float = blended_filtered.astype(np.float32) / 255.0
-                cv2.addWeighted(filtered_mask_float, alpha, blended_filtered_float, 1 - alpha, 0, blended_filtered_float)
-                blended_filtered = (blended_filtered_float * 255).astype(np.uint8)
-            else:
-                logging.warning("Filtered mask is empty, returning original image with message")
-                return (
-                    base64.b64encode(cv2.imencode(".jpg", cv2.cvtColor(original_image, cv2.COLOR_RGB2BGR))[1]).decode("utf-8"),
-                    "No valid pixels found for selected conditions. The mask may not contain the expected colors."
-                )
+                    logging.warning("Filtered mask is empty, returning original image with message")
+                    return (
+                        base64.b64encode(cv2.imencode(".jpg", cv2.cvtColor(original_image, cv2.COLOR_RGB2BGR))[1]).decode("utf-8"),
+                        "No valid pixels found for selected conditions. The mask may not contain the expected colors."
+                    )
 
-        _, buffer = cv2.imencode(".jpg", cv2.cvtColor(blended_filtered, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
-        encoded_image = base64.b64encode(buffer).decode("utf-8")
+        with observe_stage("filter", "encode"):
+            _, buffer = cv2.imencode(".jpg", cv2.cvtColor(blended_filtered, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
+            encoded_image = base64.b64encode(buffer).decode("utf-8")
 
         if len(encoded_image) < 100:
             raise HTTPException(status_code=500, detail="Generated filtered base64 image string is too short or invalid")
@@ -416,4 +513,4 @@ async def apply_filters(original_image_path: str, mask_path: str, selected_condi
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Filter application failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Filter application failed: {str(e)}")
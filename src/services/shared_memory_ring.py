@@ -0,0 +1,180 @@
+# src/services/shared_memory_ring.py
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Layout of one segment: [generation per slot (int64)] [slot 0 input | slot 0 output] [slot 1 ...]
+_ALIGNMENT = 64
+
+
+def _aligned(size: int) -> int:
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+
+class RingLayout:
+    """Byte offsets shared by the owning process and every attached worker."""
+
+    def __init__(self, slots: int, input_shape: Tuple[int, ...], output_shape: Tuple[int, ...]):
+        self.slots = slots
+        self.input_shape = tuple(input_shape)
+        self.output_shape = tuple(output_shape)
+        self.input_bytes = _aligned(int(np.prod(input_shape)) * np.dtype(np.float32).itemsize)
+        self.output_bytes = _aligned(int(np.prod(output_shape)) * np.dtype(np.uint8).itemsize)
+        self.header_bytes = _aligned(slots * np.dtype(np.int64).itemsize)
+        self.slot_bytes = self.input_bytes + self.output_bytes
+        self.total_bytes = self.header_bytes + slots * self.slot_bytes
+
+    def views(self, buf) -> Tuple[np.ndarray, List[np.ndarray], List[np.ndarray]]:
+        generations = np.ndarray((self.slots,), dtype=np.int64, buffer=buf, offset=0)
+        inputs, outputs = [], []
+        for index in range(self.slots):
+            offset = self.header_bytes + index * self.slot_bytes
+            inputs.append(np.ndarray(self.input_shape, dtype=np.float32, buffer=buf, offset=offset))
+            outputs.append(np.ndarray(self.output_shape, dtype=np.uint8, buffer=buf, offset=offset + self.input_bytes))
+        return generations, inputs, outputs
+
+
+class RingSlot:
+    def __init__(self, index: int, input_view: np.ndarray, output_view: np.ndarray):
+        self.index = index
+        self.input = input_view
+        self.output = output_view
+        self.generation = 0
+        self.leased_at: Optional[float] = None
+        self.in_flight = False
+
+
+class SharedMemoryRing:
+    """
+    Fixed set of shared-memory slots, each holding one (4, 128, 256, 3) float32
+    input batch and its (4, 128, 256) uint8 class-index output. The API process
+    owns the segment; inference workers attach by name and read/write in place,
+    so nothing is pickled through the pool's pipes.
+
+    Slots are leased and released by the owner only. A slot whose batch was
+    handed to a worker is never reclaimed early, however long it waits in the
+    pool's backlog: the submit's completion releases it. A slot still leased
+    but not in flight after lease_seconds is treated as leaked (its request
+    went away without releasing it): it is logged, its generation is bumped
+    and it goes back to the free list.
+    """
+
+    def __init__(self, slots: int, input_shape: Tuple[int, ...], output_shape: Tuple[int, ...], lease_seconds: float = 60.0):
+        self.layout = RingLayout(slots, input_shape, output_shape)
+        self.lease_seconds = lease_seconds
+        self.shm = shared_memory.SharedMemory(create=True, size=self.layout.total_bytes)
+        self._generations, inputs, outputs = self.layout.views(self.shm.buf)
+        self._generations[:] = 0
+        self.slots = [RingSlot(i, inputs[i], outputs[i]) for i in range(slots)]
+        self._free = list(range(slots))
+        self._lock = threading.Lock()
+        self.leaked_total = 0
+        self.exhausted_total = 0
+        logger.info(f"Created shared-memory ring {self.shm.name}: {slots} slots, {self.layout.total_bytes / 1e6:.1f} MB")
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _reap_expired(self, now: float) -> None:
+        for slot in self.slots:
+            # In-flight slots are excluded: a worker may still read or write them, and
+            # reusing one would hand another request's batch to that worker
+            if slot.leased_at is not None and not slot.in_flight and now - slot.leased_at > self.lease_seconds:
+                self.leaked_total += 1
+                logger.warning(
+                    f"Shared-memory slot {slot.index} held for {now - slot.leased_at:.1f}s "
+                    f"without being submitted, reclaiming it as leaked"
+                )
+                self._recycle(slot)
+
+    def _recycle(self, slot: RingSlot) -> None:
+        slot.generation += 1
+        self._generations[slot.index] = slot.generation
+        slot.leased_at = None
+        slot.in_flight = False
+        self._free.append(slot.index)
+
+    def lease(self) -> Optional[RingSlot]:
+        """A free slot, or None when every slot is in use."""
+        with self._lock:
+            self._reap_expired(time.monotonic())
+            if not self._free:
+                self.exhausted_total += 1
+                return None
+            slot = self.slots[self._free.pop()]
+            slot.leased_at = time.monotonic()
+            return slot
+
+    def release(self, slot: RingSlot, generation: Optional[int] = None) -> None:
+        """Return a slot; a release for an already reclaimed generation is ignored."""
+        with self._lock:
+            if slot.leased_at is None or (generation is not None and generation != slot.generation):
+                return
+            self._recycle(slot)
+
+    def slot_for(self, array: np.ndarray) -> Optional[RingSlot]:
+        """The leased slot whose input view is `array`, if any."""
+        for slot in self.slots:
+            if slot.leased_at is not None and array is slot.input:
+                return slot
+        return None
+
+    @contextmanager
+    def input_buffer(self):
+        """
+        Yield a slot's input view to preprocess into, or None when the ring is full.
+        A slot whose batch is already with a worker is released by the worker's
+        completion instead, so a cancelled request cannot free it early.
+        """
+        slot = self.lease()
+        generation = slot.generation if slot is not None else None
+        try:
+            yield slot.input if slot is not None else None
+        finally:
+            if slot is not None and not slot.in_flight:
+                self.release(slot, generation)
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            leased = [slot for slot in self.slots if slot.leased_at is not None]
+            return {
+                "name": self.name,
+                "slots": self.layout.slots,
+                "in_use": len(leased),
+                "oldest_lease_seconds": round(max((now - s.leased_at for s in leased), default=0.0), 3),
+                "leaked_total": self.leaked_total,
+                "exhausted_total": self.exhausted_total,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            leased = [slot.index for slot in self.slots if slot.leased_at is not None]
+        if leased:
+            logger.warning(f"Closing shared-memory ring {self.name} with slots {leased} still leased")
+        # Drop our views before closing, otherwise the buffer cannot be released
+        self._generations = None
+        self.slots = []
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class AttachedRing:
+    """A worker's view of a ring created by another process."""
+
+    def __init__(self, name: str, layout: RingLayout):
+        self.shm = shared_memory.SharedMemory(name=name)
+        self.generations, self.inputs, self.outputs = layout.views(self.shm.buf)
+
+    def is_current(self, index: int, generation: int) -> bool:
+        return int(self.generations[index]) == generation
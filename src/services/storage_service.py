@@ -0,0 +1,245 @@
+# src/services/storage_service.py
+import os
+import heapq
+import shutil
+import logging
+from functools import lru_cache
+from typing import BinaryIO, Iterator, Optional, Tuple
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ORIGINAL_PREFIX = "uploads/original"
+MASK_PREFIX = "uploads/masks"
+OVERLAY_PREFIX = "uploads/overlay"
+ARTIFACT_PREFIXES = [ORIGINAL_PREFIX, MASK_PREFIX, OVERLAY_PREFIX]
+# Keys per LocalStorage.list_keys page, the same as one S3 ListObjectsV2 response
+LIST_PAGE_SIZE = 1000
+
+
+def artifact_key(prefix: str, filename: str) -> str:
+    """Storage keys are always '/'-separated, regardless of backend or OS."""
+    return f"{prefix}/{filename}"
+
+
+class StorageBackend:
+    """Interface for where uploaded radiographs, masks and overlays live."""
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    def put_stream(self, key: str, stream: BinaryIO, content_type: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    def get_bytes(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def iter_chunks(self, key: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Delete a key; deleting a missing key is not an error."""
+        raise NotImplementedError
+
+    def list_keys(self, prefix: str, start_after: Optional[str] = None) -> Iterator[Tuple[str, float]]:
+        """
+        Stream (key, last-modified timestamp) pairs under a prefix in key order,
+        beginning after start_after when given so a long scan can resume.
+        """
+        raise NotImplementedError
+
+    def url(self, key: str, expires_in: Optional[int] = None) -> str:
+        """URL a client can fetch the object from (static path or presigned URL)."""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path for the key when the backend is local, otherwise None."""
+        return None
+
+    def prepare(self) -> None:
+        """One-time setup at process start (e.g. creating upload directories)."""
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def _open_for_write(self, key: str):
+        path = self._path(key)
+        try:
+            return open(path, "wb")
+        except FileNotFoundError:
+            # Directories are created by prepare(); only recreate them if removed since
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            return open(path, "wb")
+
+    def prepare(self) -> None:
+        for prefix in ARTIFACT_PREFIXES:
+            os.makedirs(self._path(prefix), exist_ok=True)
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        with self._open_for_write(key) as file_object:
+            file_object.write(data)
+
+    def put_stream(self, key: str, stream: BinaryIO, content_type: Optional[str] = None) -> None:
+        with self._open_for_write(key) as file_object:
+            shutil.copyfileobj(stream, file_object, 1024 * 1024)
+
+    def get_bytes(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as file_object:
+            return file_object.read()
+
+    def iter_chunks(self, key: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as file_object:
+            while chunk := file_object.read(chunk_size):
+                yield chunk
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list_keys(self, prefix: str, start_after: Optional[str] = None) -> Iterator[Tuple[str, float]]:
+        directory = self._path(prefix)
+        if not os.path.isdir(directory):
+            return
+        key_prefix = artifact_key(prefix, "")
+        after = None
+        if start_after is not None:
+            if not start_after.startswith(key_prefix):
+                if start_after > key_prefix:
+                    return
+            else:
+                after = start_after[len(key_prefix):]
+        # Directory order is arbitrary, so keys come out sorted to stay a stable cursor. Like an
+        # S3 listing they come a page at a time: each pass over the directory keeps only the
+        # next LIST_PAGE_SIZE names, never the whole directory
+        while True:
+            with os.scandir(directory) as entries:
+                names = heapq.nsmallest(
+                    LIST_PAGE_SIZE,
+                    (
+                        entry.name
+                        for entry in entries
+                        if (after is None or entry.name > after) and entry.is_file(follow_symlinks=False)
+                    ),
+                )
+            for name in names:
+                try:
+                    mtime = os.stat(os.path.join(directory, name), follow_symlinks=False).st_mtime
+                except FileNotFoundError:
+                    continue
+                yield artifact_key(prefix, name), mtime
+            if len(names) < LIST_PAGE_SIZE:
+                return
+            after = names[-1]
+
+    def url(self, key: str, expires_in: Optional[int] = None) -> str:
+        # Served by the /uploads static mount in src/main.py
+        return f"/{key}"
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+
+class S3Storage(StorageBackend):
+    """S3-compatible backend (AWS S3, MinIO, or moto's server mode for local testing)."""
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        presign_expires: int = 3600,
+    ):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the boto3 package") from e
+        self.bucket = bucket
+        self.presign_expires = presign_expires
+        self._client_error = ClientError
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region_name,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra)
+
+    def put_stream(self, key: str, stream: BinaryIO, content_type: Optional[str] = None) -> None:
+        # upload_fileobj switches to multipart uploads for large bodies
+        extra = {"ContentType": content_type} if content_type else None
+        self.client.upload_fileobj(stream, self.bucket, key, ExtraArgs=extra)
+
+    def get_bytes(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def iter_chunks(self, key: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        body = self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def list_keys(self, prefix: str, start_after: Optional[str] = None) -> Iterator[Tuple[str, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        # S3 lists keys in UTF-8 byte order; StartAfter resumes without re-listing the head
+        extra = {"StartAfter": start_after} if start_after else {}
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{prefix}/", **extra):
+            for item in page.get("Contents", []):
+                yield item["Key"], item["LastModified"].timestamp()
+
+    def url(self, key: str, expires_in: Optional[int] = None) -> str:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expires_in or self.presign_expires,
+        )
+
+
+@lru_cache()
+def get_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.STORAGE_LOCAL_ROOT)
+    if settings.STORAGE_BACKEND == "s3":
+        if not settings.S3_BUCKET:
+            raise RuntimeError("S3_BUCKET must be set when STORAGE_BACKEND=s3")
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            presign_expires=settings.S3_PRESIGN_EXPIRES,
+        )
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")